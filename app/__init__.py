@@ -5,8 +5,9 @@ from flask_socketio import SocketIO  # type: ignore
 from flask_cors import CORS  # type: ignore
 from flask_sqlalchemy import SQLAlchemy  # type: ignore
 from config import Config  # Importado antes!
-from flasgger import Swagger # type: ignore
 from app.decorators import role_required # type: ignore
+from app.offload import configurar_pool, configurar_psycopg2
+from app.metricas import configurar_metricas
 
 db = SQLAlchemy()
 migrate = Migrate()
@@ -17,22 +18,40 @@ socketio = SocketIO(cors_allowed_origins="*", async_mode='eventlet')
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    configurar_psycopg2()  # Antes de abrir a primeira conexão
 
     db.init_app(app)
-    migrate.init_app(app, db)
+    from app.banco import configurar_banco
+    configurar_banco(app)
+    from app.busca import fora_do_autogenerate
+    migrate.init_app(app, db, include_object=fora_do_autogenerate)
     jwt.init_app(app)
     CORS(app, origins=[
             "http://localhost:4200",
             "https://resolveja-frontend-3tqrvfefo-projetoaf.vercel.app",
             "https://resolveja-frontend.vercel.app"
         ], supports_credentials=True)
-    socketio.init_app(app)
+    socketio.init_app(
+        app,
+        message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'],
+        channel=app.config['SOCKETIO_CHANNEL'],
+        transports=app.config['SOCKETIO_TRANSPORTS']
+    )
+    configurar_pool(app)
+    configurar_metricas(app)
 
     # ⚠️ Importações de rotas depois da inicialização do db
-    from app.routes import main, admin_routes
+    from app.routes import main, admin_routes, UPLOAD_FOLDER
     from app.auth import auth
     from app.routes import denuncia_routes  # 📌 Importa as rotas de denúncias
-    from app.denuncias import denuncia_bp  # 📌 Importa o blueprint de denúncias
+    from app import eventos  # noqa: F401  📌 Registra o feed de alterações do Socket.IO
+
+    from app.serializers import configurar_json
+    configurar_json(app)
+    from app.storage import configurar_armazenamento
+    configurar_armazenamento(app, UPLOAD_FOLDER)
+    from app.cache import configurar_cache
+    configurar_cache(app)
 
     app.register_blueprint(main)
     app.register_blueprint(auth, url_prefix='/auth')
@@ -40,86 +59,10 @@ def create_app():
     app.register_blueprint(denuncia_routes, url_prefix='/api')  # 📌 Adiciona as rotas de denúncias
     
 
-    # Configuração detalhada do Swagger
-    Swagger(app, template={
-        "swagger": "2.0",
-        "info": {
-            "title": "API de Denúncias - ResolveJá",
-            "version": "1.0.0",
-            "description": "API para registro, consulta e administração de denúncias públicas.",
-            "contact": {
-                "name": "Equipe ResolveJá",
-                "email": "contato@resolveja.com"
-            },
-            "license": {
-                "name": "MIT",
-                "url": "https://opensource.org/licenses/MIT"
-            }
-        },
-        "host": "localhost:5000",
-        "basePath": "/apidocs",
-        "schemes": ["http"],
-        "tags": [
-            {
-                "name": "Autenticação",
-                "description": "Operações de login, registro e autenticação"
-            },
-            {
-                "name": "Denúncias",
-                "description": "CRUD de denúncias"
-            },
-            {
-                "name": "Administração",
-                "description": "Rotas administrativas"
-            }
-        ],
-        "securityDefinitions": {
-            "Bearer": {
-                "type": "apiKey",
-                "name": "Authorization",
-                "in": "header",
-                "description": "JWT Authorization header usando o esquema Bearer. Exemplo: 'Authorization: Bearer {token}'"
-            }
-        },
-        "definitions": {
-            "Denuncia": {
-                "type": "object",
-                "properties": {
-                    "id": {"type": "integer", "example": 1},
-                    "titulo": {"type": "string", "example": "Buraco na rua"},
-                    "descricao": {"type": "string", "example": "Há um buraco perigoso na rua X"},
-                    "status": {"type": "string", "enum": ["aberta", "em_andamento", "resolvida"], "example": "aberta"},
-                    "dataCriacao": {"type": "string", "format": "date-time", "example": "2024-05-19T12:00:00"},
-                    "imagemUrl": {"type": "string", "example": "/uploads/denuncia1.jpg"},
-                    "latitude": {"type": "number", "example": -23.55052},
-                    "longitude": {"type": "number", "example": -46.633308},
-                    "usuarioId": {"type": "integer", "example": 2}
-                }
-            },
-            "Usuario": {
-                "type": "object",
-                "properties": {
-                    "id": {"type": "integer", "example": 2},
-                    "nome": {"type": "string", "example": "Maria"},
-                    "email": {"type": "string", "example": "maria@email.com"},
-                    "role": {"type": "string", "enum": ["admin", "usuario"], "example": "usuario"}
-                }
-            },
-            "Login": {
-                "type": "object",
-                "properties": {
-                    "email": {"type": "string", "example": "usuario@email.com"},
-                    "senha": {"type": "string", "example": "123456"}
-                }
-            },
-            "Token": {
-                "type": "object",
-                "properties": {
-                    "access_token": {"type": "string", "example": "eyJ0eXAiOiJKV1QiLCJhbGciOi..."}
-                }
-            }
-        }
-    })
+    from app.swagger import configurar_swagger
+    configurar_swagger(app)
+    from app.banco import aquecer_pool
+    aquecer_pool(app)  # Por último: a primeira requisição já encontra conexões abertas
  
      # Protege as rotas do Swagger
     
@@ -1,7 +1,8 @@
-from flask import Blueprint, request, jsonify   #type:ignore
+from flask import Blueprint, request, jsonify, current_app   #type:ignore
 from app.models import db, User
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity  #type:ignore
 from werkzeug.security import generate_password_hash #type:ignore
+from app.offload import executar_bloqueante
 
 auth = Blueprint('auth', __name__)
 
@@ -60,12 +61,11 @@ def register():
     """
     try:
         data = request.get_json()
-        print("📌 Dados Recebidos:", data)
 
         # ✅ Agora verifica todos os campos obrigatórios
         required_fields = ['username', 'email', 'password', 'phone', 'cpf']
         if not data or any(field not in data for field in required_fields):
-            print("❌ Dados incompletos")
+            current_app.logger.info("Cadastro recusado: dados incompletos")
             return jsonify({"error": "Todos os campos são obrigatórios"}), 400
 
         # 🔍 Verificar se email, username ou CPF já existem
@@ -77,11 +77,11 @@ def register():
 
         if existing_user:
             conflict_field = 'email' if existing_user.email == data['email'] else 'username' if existing_user.username == data['username'] else 'cpf'
-            print(f"❌ {conflict_field.capitalize()} já cadastrado!")
+            current_app.logger.info("Cadastro recusado: %s já cadastrado", conflict_field)
             return jsonify({"error": f"{conflict_field.capitalize()} já está em uso!"}), 409
 
-        # 🔒 Hash da senha
-        hashed_password = generate_password_hash(data['password'], method='pbkdf2:sha256')
+        # 🔒 Hash da senha (CPU-bound: roda no pool de threads nativas)
+        hashed_password = executar_bloqueante(generate_password_hash, data['password'], method='pbkdf2:sha256')
 
         # ✅ Cria usuário com todos os campos
         new_user = User(
@@ -95,11 +95,12 @@ def register():
         db.session.add(new_user)
         db.session.commit()
 
-        print("✅ Usuário registrado com sucesso!")
+        current_app.logger.info("Usuário %s registrado", new_user.id)
         return jsonify({"message": "Usuário registrado com sucesso!"}), 201
 
-    except Exception as e:
-        print("❌ ERRO AO REGISTRAR:", str(e))
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Erro ao registrar usuário")
         return jsonify({"error": "Erro interno no servidor"}), 500
 
 
@@ -0,0 +1,67 @@
+# Limite de tempo dos comandos SQL no PostgreSQL (statement_timeout).
+#
+# DB_POOL_MODE='direct': o limite vai nas opções da conexão (config.engine_options)
+# e vale para a sessão inteira do servidor.
+# DB_POOL_MODE='pgbouncer' (modo transação): cada transação pode cair numa
+# conexão diferente do servidor e o PgBouncer recusa 'options' na conexão,
+# então o limite é aplicado com SET LOCAL no início de cada transação.
+#
+# Uma consulta que passa do limite é cancelada pelo banco (erro
+# QueryCanceled) em vez de prender a conexão e a green thread do worker.
+#
+# aquecer_pool abre conexões no boot: num deploy que escala a partir de zero
+# o handshake (TCP, TLS, autenticação) não fica na latência da primeira requisição.
+from contextlib import ExitStack
+
+from sqlalchemy import event, text  # type: ignore
+from sqlalchemy.exc import SQLAlchemyError  # type: ignore
+from sqlalchemy.orm import configure_mappers  # type: ignore
+from sqlalchemy.pool import NullPool  # type: ignore
+
+from app import db
+
+
+def limitar_tempo(session, ms):
+    """statement_timeout só até o fim da transação atual da sessão (0 = sem limite)."""
+    if session.get_bind().dialect.name == 'postgresql':
+        session.execute(text(f'SET LOCAL statement_timeout = {int(ms)}'))
+
+
+def configurar_banco(app):
+    ms = app.config['DB_STATEMENT_TIMEOUT_MS']
+    if app.config['DB_POOL_MODE'] != 'pgbouncer' or not ms:
+        return
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'postgresql':
+        return
+
+    @event.listens_for(engine, 'begin')
+    def _limite_por_transacao(conn):
+        conn.exec_driver_sql(f'SET LOCAL statement_timeout = {int(ms)}')
+
+
+def aquecer_pool(app):
+    """Configura os mappers e deixa DB_POOL_WARMUP conexões abertas no pool.
+
+    Com gunicorn --preload isto roda no master antes do fork: não use as duas
+    coisas juntas (as conexões seriam compartilhadas entre os workers).
+    Banco indisponível no boot não impede a subida: só fica no log.
+    """
+    configure_mappers()  # Senão feito na primeira consulta
+    quantidade = app.config['DB_POOL_WARMUP']
+    if not quantidade:
+        return 0
+    with app.app_context():
+        engine = db.engine
+    if isinstance(engine.pool, NullPool):  # PgBouncer sem pool próprio: nada a manter aberto
+        return 0
+    try:
+        # Todas abertas ao mesmo tempo, para serem conexões distintas no pool
+        with ExitStack() as pilha:
+            for _ in range(quantidade):
+                pilha.enter_context(engine.connect()).exec_driver_sql('SELECT 1')
+    except SQLAlchemyError as e:
+        app.logger.warning('Aquecimento do pool falhou: %s', e)
+        return 0
+    return quantidade
@@ -0,0 +1,147 @@
+# Busca textual em título e descrição das denúncias.
+#
+# PostgreSQL: coluna gerada `busca` (tsvector, configuração 'portuguese', título
+# com peso A e descrição com peso B) + índice GIN. SQLite (testes locais): tabela
+# FTS5 `denuncia_fts` com conteúdo externo, mantida por triggers.
+#
+# Nenhuma das duas estruturas está no modelo: são criadas pela migração e, no
+# create_all, pelos DDLs registrados abaixo.
+from markupsafe import escape  # type: ignore
+from sqlalchemy import DDL, column, event, func, literal_column, table  # type: ignore
+
+from app import db
+from app.models import Denuncia
+from app.serializers import Projecao
+
+CONFIG_TEXTO = 'portuguese'
+# O banco marca os termos com caracteres de uso privado (não são HTML); destacar()
+# escapa o texto do usuário e só então os troca por <mark>
+MARCA_INICIO, MARCA_FIM = '\ue000', '\ue001'
+MAX_CONSULTA = 200  # Tamanho máximo de ?q=
+
+
+class BuscaIndisponivel(Exception):
+    pass
+
+POSTGRES_DDL = (
+    f"""ALTER TABLE denuncia ADD COLUMN busca tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{CONFIG_TEXTO}', coalesce(titulo, '')), 'A') ||
+        setweight(to_tsvector('{CONFIG_TEXTO}', coalesce(descricao, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX ix_denuncia_busca ON denuncia USING gin (busca)",
+)
+
+SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE denuncia_fts USING fts5(
+        titulo, descricao, content='denuncia', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER denuncia_fts_ai AFTER INSERT ON denuncia BEGIN
+        INSERT INTO denuncia_fts(rowid, titulo, descricao) VALUES (new.id, new.titulo, new.descricao);
+    END""",
+    """CREATE TRIGGER denuncia_fts_ad AFTER DELETE ON denuncia BEGIN
+        INSERT INTO denuncia_fts(denuncia_fts, rowid, titulo, descricao)
+        VALUES ('delete', old.id, old.titulo, old.descricao);
+    END""",
+    """CREATE TRIGGER denuncia_fts_au AFTER UPDATE OF titulo, descricao ON denuncia BEGIN
+        INSERT INTO denuncia_fts(denuncia_fts, rowid, titulo, descricao)
+        VALUES ('delete', old.id, old.titulo, old.descricao);
+        INSERT INTO denuncia_fts(rowid, titulo, descricao) VALUES (new.id, new.titulo, new.descricao);
+    END""",
+)
+
+for _sql in POSTGRES_DDL:
+    event.listen(Denuncia.__table__, 'after_create', DDL(_sql).execute_if(dialect='postgresql'))
+for _sql in SQLITE_DDL:
+    event.listen(Denuncia.__table__, 'after_create', DDL(_sql).execute_if(dialect='sqlite'))
+
+
+def fora_do_autogenerate(obj, nome, tipo, refletido, comparado):
+    """include_object do Alembic: ignora as estruturas de busca, que não estão no modelo."""
+    if tipo == 'table' and nome.startswith('denuncia_fts'):
+        return False
+    if tipo == 'column' and nome == 'busca' and obj.table.name == 'denuncia':
+        return False
+    if tipo == 'index' and nome == 'ix_denuncia_busca':
+        return False
+    return True
+
+
+def _consulta_fts5(q):
+    # Cada palavra vira um termo entre aspas (sem operadores do FTS5 vindos do
+    # usuário); a última aceita prefixo, para buscar enquanto se digita
+    termos = ['"' + t.replace('"', '""') + '"' for t in q.split()]
+    termos[-1] += '*'
+    return ' '.join(termos)
+
+
+def destacar(texto):
+    """Trecho devolvido pelo banco como HTML seguro, com os termos entre <mark>."""
+    if texto is None:
+        return None
+    return str(escape(texto)).replace(MARCA_INICIO, '<mark>').replace(MARCA_FIM, '</mark>')
+
+
+def buscar(campos, q, query_filtros, limit, offset=0):
+    """Executa a busca e devolve (projecao, linhas) ordenadas por relevância.
+
+    linha[projecao.extras] traz (relevância, título destacado, trecho da
+    descrição destacado), com as marcas do banco: passe-os por destacar(). `query_filtros(query)` aplica os filtros da listagem.
+    Lança BuscaIndisponivel se o banco não tem busca textual configurada.
+    """
+    dialeto = db.session.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        return _buscar_postgres(campos, q, query_filtros, limit, offset)
+    if dialeto == 'sqlite':
+        return _buscar_sqlite(campos, q, query_filtros, limit, offset)
+    raise BuscaIndisponivel(f'Busca textual não disponível no banco {dialeto}')
+
+
+def _buscar_postgres(campos, q, query_filtros, limit, offset):
+    tsquery = func.websearch_to_tsquery(CONFIG_TEXTO, q)
+    busca = literal_column('denuncia.busca')
+    rank = func.ts_rank_cd(busca, tsquery)
+
+    # Os ids mais relevantes saem do índice GIN; o ts_headline (caro: relê o
+    # texto) roda só nessas linhas
+    topo = query_filtros(
+        db.session.query(Denuncia.id.label('id'), rank.label('rank'))
+        .filter(busca.op('@@')(tsquery))
+    ).order_by(rank.desc(), Denuncia.id.desc()).limit(limit).offset(offset).subquery()
+
+    opcoes = f'StartSel="{MARCA_INICIO}", StopSel="{MARCA_FIM}"'
+    projecao = Projecao(campos, extras=(
+        topo.c.rank,
+        func.ts_headline(CONFIG_TEXTO, func.coalesce(Denuncia.titulo, ''), tsquery,
+                         opcoes + ', HighlightAll=true').label('destaque_titulo'),
+        func.ts_headline(CONFIG_TEXTO, func.coalesce(Denuncia.descricao, ''), tsquery,
+                         opcoes + ', MaxFragments=2').label('destaque_descricao'),
+    ))
+    linhas = (
+        projecao.consulta()
+        .join(topo, topo.c.id == Denuncia.id)
+        .order_by(topo.c.rank.desc(), Denuncia.id.desc())
+        .all()
+    )
+    return projecao, linhas
+
+
+def _buscar_sqlite(campos, q, query_filtros, limit, offset):
+    fts = literal_column('denuncia_fts')
+    conteudo = table('denuncia_fts', column('rowid'))
+    # bm25: menor é melhor; invertido para seguir a convenção do ts_rank
+    rank = (-func.bm25(fts, 2.0, 1.0)).label('relevancia')
+    projecao = Projecao(campos, extras=(
+        rank,
+        func.highlight(fts, 0, MARCA_INICIO, MARCA_FIM).label('destaque_titulo'),
+        func.snippet(fts, 1, MARCA_INICIO, MARCA_FIM, '…', 16).label('destaque_descricao'),
+    ))
+    linhas = (
+        query_filtros(projecao.consulta())
+        .join(conteudo, conteudo.c.rowid == Denuncia.id)
+        .filter(fts.op('MATCH')(_consulta_fts5(q)))
+        .order_by(rank.desc(), Denuncia.id.desc())
+        .limit(limit).offset(offset)
+        .all()
+    )
+    return projecao, linhas
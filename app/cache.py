@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g  # type: ignore
+
+
+class TTLCache:
+    """Cache LRU em memória do processo, com expiração por entrada.
+
+    Cada worker tem a sua cópia; o TTL limita por quanto tempo um worker pode
+    servir um valor desatualizado depois de uma escrita feita em outro.
+    """
+
+    def __init__(self, ttl=60, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._dados.get(key)
+            if item is None:
+                return default
+            valor, expira = item
+            if expira < time.monotonic():
+                del self._dados[key]
+                return default
+            self._dados.move_to_end(key)
+            return valor
+
+    def set(self, key, valor, ttl=None):
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._dados[key] = (valor, expira)
+            self._dados.move_to_end(key)
+            while len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._dados.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+
+class _BackendLocal:
+    """Respostas num TTLCache do processo.
+
+    Com um único worker as gerações são contadores do processo, incrementados
+    no commit: um acerto não vai ao banco. Com vários workers (`compartilhado`)
+    um commit em outro processo não chegaria aqui, então a geração de cada tag
+    é a versão da tabela no banco (contador_versao, a mesma da ETag), lida uma
+    vez por requisição; com Redis o acerto não consulta o banco em nenhum caso.
+    """
+
+    def __init__(self, ttl, maxsize, compartilhado=False):
+        self._entradas = TTLCache(ttl=ttl, maxsize=maxsize)
+        self.compartilhado = compartilhado
+        self._geracoes = {}
+        self._lock = threading.Lock()
+
+    def geracoes(self, tags):
+        if self.compartilhado:
+            from app.models import versoes_da_requisicao  # Evita dependência circular
+            return versoes_da_requisicao(tags)
+        with self._lock:
+            return [self._geracoes.get(tag, 0) for tag in tags]
+
+    def invalidar(self, tags):
+        if self.compartilhado:
+            return  # As versões já mudaram no commit
+        with self._lock:
+            for tag in tags:
+                self._geracoes[tag] = self._geracoes.get(tag, 0) + 1
+
+    def obter(self, chave):
+        return self._entradas.get(chave)
+
+    def gravar(self, chave, item):
+        self._entradas.set(chave, item)
+
+
+class _BackendRedis:
+    """Respostas e gerações no Redis, compartilhados entre workers e instâncias.
+
+    Falhas do Redis viram cache miss: o endpoint continua respondendo pelo banco.
+    """
+
+    def __init__(self, url, ttl, prefixo='resolveja:resp:'):
+        import redis  # type: ignore
+        self._erro = redis.RedisError
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.ttl = ttl
+        self.prefixo = prefixo
+
+    def geracoes(self, tags):
+        try:
+            valores = self._redis.mget([f'{self.prefixo}tag:{tag}' for tag in tags])
+        except self._erro:
+            return None
+        return [int(v) if v else 0 for v in valores]
+
+    def invalidar(self, tags):
+        try:
+            with self._redis.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.incr(f'{self.prefixo}tag:{tag}')
+                pipe.execute()
+        except self._erro:
+            logging.getLogger(__name__).exception('Falha ao invalidar tags %s no Redis', tags)
+
+    def obter(self, chave):
+        try:
+            dados = self._redis.get(self.prefixo + chave)
+        except self._erro:
+            return None
+        if dados is None:
+            return None
+        cabecalho, corpo = dados.split(b'\n', 1)
+        status, headers = json.loads(cabecalho)
+        return status, headers, corpo
+
+    def gravar(self, chave, item):
+        status, headers, corpo = item
+        dados = json.dumps([status, headers]).encode() + b'\n' + corpo
+        try:
+            self._redis.set(self.prefixo + chave, dados, ex=self.ttl)
+        except self._erro:
+            pass
+
+
+class CacheRespostas:
+    """Cache de respostas HTTP invalidado por tag.
+
+    Cada tag (nome de tabela) tem uma geração que entra na chave; a cada
+    escrita na tabela a geração muda (versão no banco ou contador no Redis) e
+    as respostas que dependiam dela deixam de ser encontradas (e expiram pelo
+    LRU/TTL). Sem backend configurado não faz nada.
+    """
+
+    def __init__(self):
+        self.backend = None
+
+    def configurar(self, url, ttl, maxsize, workers=1):
+        if url == 'off':
+            self.backend = None
+        elif url:
+            self.backend = _BackendRedis(url, ttl)
+        else:
+            self.backend = _BackendLocal(ttl, maxsize, compartilhado=workers > 1)
+
+    @property
+    def ativo(self):
+        return self.backend is not None
+
+    def chave(self, base, tags):
+        """Chave da resposta para `base` (endpoint + query) nas gerações atuais das tags."""
+        geracoes = self.backend.geracoes(tags)
+        if geracoes is None:
+            return None
+        resumo = hashlib.sha1(base.encode()).hexdigest()
+        return f"{resumo}:{'-'.join(str(g) for g in geracoes)}"
+
+    def obter(self, chave):
+        return self.backend.obter(chave) if chave else None
+
+    def gravar(self, chave, item):
+        if chave:
+            self.backend.gravar(chave, item)
+
+    def invalidar(self, *tags):
+        if self.backend is not None and tags:
+            self.backend.invalidar(tags)
+
+
+# Respostas dos GETs públicos; configurado em create_app (RESPONSE_CACHE_*)
+resposta_cache = CacheRespostas()
+
+
+def configurar_cache(app):
+    resposta_cache.configurar(
+        app.config['RESPONSE_CACHE_URL'],
+        ttl=app.config['RESPONSE_CACHE_TTL'],
+        maxsize=app.config['RESPONSE_CACHE_MAXSIZE'],
+        workers=app.config['WEB_CONCURRENCY'],
+    )
+    # Versões lidas por versoes_da_requisicao valem só para a requisição atual
+    app.teardown_request(lambda exc: g.pop('_versoes_tabelas', None))
+    return resposta_cache
@@ -1,6 +1,26 @@
+import zlib
 from functools import wraps
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request #type: ignore
-from flask import jsonify, request #type: ignore
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request #type: ignore
+from flask import current_app, jsonify, make_response, request #type: ignore
+from app.cache import TTLCache, resposta_cache
+from app.metricas import cache_respostas
+
+# Papel por usuário, consultado só para tokens emitidos sem a claim 'role'.
+# Invalidado (após o commit) quando o role de um usuário muda.
+role_cache = TTLCache(ttl=300, maxsize=4096)
+
+
+def _role_do_usuario(user_id):
+    role = role_cache.get(user_id)
+    if role is None:
+        from app.models import User  # Importa o modelo User aqui para evitar dependências circulares
+        user = User.query.get(user_id)
+        if not user:
+            return None
+        role = user.role
+        role_cache.set(user_id, role)
+    return role
+
 
 def role_required(required_role):
     def decorator(f):
@@ -9,13 +29,92 @@ def role_required(required_role):
             if request.method == 'OPTIONS':
                 return '', 200
             verify_jwt_in_request() # Verifica se o token JWT é válido e se o usuário tem a função necessária
-            from app.models import User  # Importa o modelo User aqui para evitar dependências circulares
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
+            # auth.login grava o role como claim no token já verificado: sem ida ao banco
+            role = get_jwt().get('role')
+            if role is None:
+                role = _role_do_usuario(get_jwt_identity())
 
-            if not user or user.role != required_role:
+            if role != required_role:
                 return jsonify({"error": "Acesso negado"}), 403  # Proibido
 
             return f(*args, **kwargs)
         return wrapper
     return decorator
+
+
+def _url_normalizada():
+    """Caminho + query string com os parâmetros em ordem (a ordem não muda a resposta)."""
+    consulta = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return f'{request.path}?{consulta}'
+
+
+def etag_condicional(*tabelas):
+    """ETag fraca derivada das versões das tabelas de que a resposta depende.
+
+    Se o If-None-Match do cliente bater, responde 304 sem executar a view
+    (nenhuma consulta pesada, nenhuma serialização). A chave inclui a query
+    string, então páginas e filtros diferentes têm ETags diferentes.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            from app.models import versoes_da_requisicao  # Evita dependência circular
+            versoes = versoes_da_requisicao(tabelas)
+            chave = zlib.crc32(_url_normalizada().encode())
+            etag = '-'.join(str(v) for v in versoes) + f'-{chave:08x}'
+
+            if request.if_none_match.contains_weak(etag):
+                resp = current_app.response_class(status=304)
+            else:
+                resp = make_response(f(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(etag, weak=True)
+            # Sempre revalida: com a ETag a revalidação custa um 304
+            resp.headers['Cache-Control'] = 'no-cache'
+            return resp
+        return wrapper
+    return decorator
+
+
+# Cabeçalhos que não são da resposta em si (recalculados ou por requisição)
+_FORA_DO_CACHE = {'content-length', 'set-cookie', 'x-cache'}
+
+
+def cache_resposta(*tags):
+    """Guarda as respostas 200 da view por URL normalizada, invalidadas por tag.
+
+    As tags são as tabelas de que a resposta depende: um commit que grava
+    numa delas invalida as respostas (ver `resposta_cache`). Vai por fora do
+    etag_condicional: um acerto não executa a view (com Redis, nem consulta
+    o banco) e a ETag guardada junto continua valendo para responder 304.
+    Respostas em stream não são guardadas.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if not resposta_cache.ativo:
+                return f(*args, **kwargs)
+            chave = resposta_cache.chave(f'{request.endpoint}:{_url_normalizada()}', tags)
+            item = resposta_cache.obter(chave)
+            if item is not None:
+                cache_respostas.inc(request.endpoint, 'hit')
+                status, headers, corpo = item
+                resp = current_app.response_class(corpo, status=status, headers=headers)
+                etag, _ = resp.get_etag()
+                if etag and request.if_none_match.contains_weak(etag):
+                    resp = current_app.response_class(status=304, headers=[
+                        (k, v) for k, v in headers if k.lower() in ('etag', 'cache-control')
+                    ])
+                resp.headers['X-Cache'] = 'HIT'
+                return resp
+
+            cache_respostas.inc(request.endpoint, 'miss')
+            resp = make_response(f(*args, **kwargs))
+            if resp.status_code == 200 and not resp.is_streamed:
+                headers = [(k, v) for k, v in resp.headers.items() if k.lower() not in _FORA_DO_CACHE]
+                resposta_cache.gravar(chave, (resp.status_code, headers, resp.get_data()))
+            resp.headers['X-Cache'] = 'MISS'
+            return resp
+        return wrapper
+    return decorator
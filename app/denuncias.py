@@ -4,6 +4,7 @@ from app.models import Denuncia
 from flask_cors import CORS # type: ignore
 from flask_jwt_extended import jwt_required, get_jwt_identity #type:ignore  # Adicione no topo do arquivo
 from app.decorators import role_required #type:ignore
+from app.serializers import Projecao, CAMPOS_LISTAGEM, CAMPOS_MINHAS
 
 denuncia_bp = Blueprint('denuncia', __name__)
 CORS(denuncia_bp, resources={r"/*": {"origins": "*"}})
@@ -26,24 +27,9 @@ def get_denuncias():
           items:
             $ref: '#/definitions/Denuncia'
     """
-    denuncias = Denuncia.query.all()
-    return jsonify([
-        {
-            'id': d.id,
-            'titulo': d.titulo,
-            'tipo': d.tipo,
-            'status': d.status,
-            'endereco': d.endereco,
-            'descricao': d.descricao,
-            'reportfotoUrl': d.reportfotoUrl,
-            'usuario': {
-                'id': d.usuario.id,
-                'nome': d.usuario.nome,
-                'username': d.usuario.username
-            } if d.usuario else None
-        }
-        for d in denuncias
-    ])
+    projecao = Projecao(CAMPOS_LISTAGEM)
+    linhas = projecao.consulta().filter(Denuncia.deleted_at.is_(None)).all()
+    return jsonify(projecao.linhas(linhas))
 
 @denuncia_bp.route('/denuncias', methods=['POST'])
 @jwt_required()
@@ -152,18 +138,11 @@ def get_denuncia(id):
       404:
         description: Denúncia não encontrada
     """
-    denuncia = Denuncia.query.get(id)
-    if not denuncia:
+    projecao = Projecao(CAMPOS_LISTAGEM)
+    linha = projecao.consulta().filter(Denuncia.id == id, Denuncia.deleted_at.is_(None)).first()
+    if not linha:
         return jsonify({"error": "Denúncia não encontrada"}), 404
-    return jsonify({
-        'id': denuncia.id,
-        'titulo': denuncia.titulo,
-        'tipo': denuncia.tipo,
-        'status': denuncia.status,
-        'endereco': denuncia.endereco,
-        'descricao': denuncia.descricao,
-        'reportfotoUrl': denuncia.reportfotoUrl
-    })
+    return jsonify(projecao.linha(linha))
 
 @denuncia_bp.route('/denuncias/<int:id>', methods=['PUT'])
 @role_required('admin')
@@ -272,14 +251,10 @@ def minhas_denuncias():
         description: Não autorizado
     """
     usuario_id = get_jwt_identity()
-    denuncias = Denuncia.query.filter_by(usuario_id=usuario_id).all()
-    return jsonify([{
-        'id': d.id,
-        'titulo': d.titulo,
-        'tipo': d.tipo,
-        'status': d.status,
-        'endereco': d.endereco,
-        'descricao': d.descricao,
-        'reportfotoUrl': d.reportfotoUrl
-        
-    } for d in denuncias])
+    projecao = Projecao(CAMPOS_MINHAS)
+    linhas = (
+        projecao.consulta()
+        .filter(Denuncia.user_id == usuario_id, Denuncia.deleted_at.is_(None))
+        .all()
+    )
+    return jsonify(projecao.linhas(linhas))
@@ -0,0 +1,154 @@
+# Feed de alterações de denúncias via Socket.IO.
+#
+# Cada criação, atualização ou remoção de Denuncia confirmada no banco vira um
+# evento 'denuncia' compacto (só os campos alterados), enviado para as salas:
+#   user:<id>       dono da denúncia (entra na conexão, com o JWT em `auth`)
+#   geo:<geohash>   região do mapa (precisões 3 a 5, via 'inscrever_regiao')
+#   admin           administradores recebem tudo
+from flask_jwt_extended import decode_token  # type: ignore
+from flask_socketio import join_room, leave_room, rooms  # type: ignore
+from sqlalchemy import event, inspect  # type: ignore
+
+from app import db, socketio
+from app.geo import geohash, geohashes_bbox, parse_bbox
+from app.models import Denuncia
+
+PRECISOES_REGIAO = (3, 4, 5)
+MAX_SALAS_REGIAO = 64
+
+# Coluna do modelo -> nome do campo no payload
+CAMPOS_PUBLICOS = {
+    'titulo': 'titulo',
+    'tipo': 'tipo',
+    'status': 'status',
+    'descricao': 'descricao',
+    'endereco': 'endereco',
+    'reportFotoUrl': 'reportFotoUrl',
+    'reportThumbUrl': 'thumbUrl',
+    'reportMediumUrl': 'mediumUrl',
+}
+
+
+def salas_regiao(lat, lng):
+    if lat is None or lng is None:
+        return []
+    return [f'geo:{geohash(lat, lng, p)}' for p in PRECISOES_REGIAO]
+
+
+def _valor_antigo(estado, attr):
+    historico = estado.attrs[attr].history
+    return (historico.deleted or historico.unchanged or [None])[0]
+
+
+def _evento(denuncia, op):
+    """Monta (payload, salas) para uma denúncia que está sendo gravada."""
+    estado = inspect(denuncia)
+    if op == 'atualizada':
+        campos = {
+            nome: getattr(denuncia, coluna)
+            for coluna, nome in CAMPOS_PUBLICOS.items()
+            if estado.attrs[coluna].history.has_changes()
+        }
+        if not campos:
+            return None
+    elif op == 'criada':
+        campos = {nome: getattr(denuncia, coluna) for coluna, nome in CAMPOS_PUBLICOS.items()}
+    else:
+        campos = {}
+
+    payload = {
+        'op': op,
+        'id': denuncia.id,
+        'campos': campos,
+        'lat': denuncia.latitude,
+        'lng': denuncia.longitude,
+    }
+    salas = {'admin', f'user:{denuncia.user_id}'}
+    salas.update(salas_regiao(denuncia.latitude, denuncia.longitude))
+    if op != 'criada':
+        # Quem está vendo a posição antiga também precisa saber que ela saiu dali
+        salas.update(salas_regiao(_valor_antigo(estado, 'latitude'), _valor_antigo(estado, 'longitude')))
+    return payload, sorted(salas)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _coleta_eventos(session, flush_context):
+    pendentes = session.info.setdefault('eventos_denuncia', [])
+    for objs, op in ((session.new, 'criada'), (session.dirty, 'atualizada'), (session.deleted, 'removida')):
+        for obj in objs:
+            if not isinstance(obj, Denuncia):
+                continue
+            if op == 'atualizada' and obj.deleted_at is not None:
+                if _valor_antigo(inspect(obj), 'deleted_at') is not None:
+                    continue  # Tombstone já publicado
+                op_obj = 'removida'  # Remoção lógica
+            else:
+                op_obj = op
+            evento = _evento(obj, op_obj)
+            if evento:
+                pendentes.append(evento)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _publica_eventos(session):
+    for payload, salas in session.info.pop('eventos_denuncia', []):
+        socketio.emit('denuncia', payload, to=salas)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _descarta_eventos(session):
+    session.info.pop('eventos_denuncia', None)
+
+
+@socketio.on('connect')
+def conectar(auth=None):
+    token = (auth or {}).get('token')
+    if not token:
+        return  # Anônimo: só salas de região
+    try:
+        claims = decode_token(token)
+    except Exception:
+        return False  # Token inválido: recusa a conexão
+    join_room(f"user:{claims['sub']}")
+    if claims.get('role') == 'admin':
+        join_room('admin')
+
+
+@socketio.on('inscrever_regiao')
+def inscrever_regiao(data):
+    """Troca as salas de região do cliente.
+
+    Aceita {'geohashes': [...]} ou {'bbox': 'oeste,sul,leste,norte'} com
+    'precisao' opcional (sem ela usa a mais fina que couber no limite).
+    Retorna (ack) a lista de salas em que o cliente ficou inscrito.
+    """
+    data = data or {}
+    try:
+        if 'geohashes' in data:
+            celulas = [str(g) for g in data['geohashes']][:MAX_SALAS_REGIAO]
+            if any(len(g) not in PRECISOES_REGIAO for g in celulas):
+                raise ValueError("precisão de geohash não suportada")
+        else:
+            bbox = parse_bbox(data['bbox'])
+            precisoes = [int(data['precisao'])] if 'precisao' in data else sorted(PRECISOES_REGIAO, reverse=True)
+            celulas = None
+            for precisao in precisoes:
+                if precisao not in PRECISOES_REGIAO:
+                    raise ValueError("precisão de geohash não suportada")
+                try:
+                    celulas = geohashes_bbox(bbox, precisao, MAX_SALAS_REGIAO)
+                    break
+                except ValueError:
+                    continue
+            if celulas is None:
+                raise ValueError("bbox grande demais")
+    except (KeyError, TypeError, ValueError) as e:
+        return {'error': str(e)}
+
+    novas = {f'geo:{g}' for g in celulas}
+    for sala in rooms():
+        if sala.startswith('geo:') and sala not in novas:
+            leave_room(sala)
+    for sala in novas:
+        join_room(sala)
+    return {'salas': sorted(novas)}
@@ -0,0 +1,119 @@
+# Utilitários de coordenadas usados pelo mapa de calor
+import numpy as np  # type: ignore
+
+# Células da grade por tile de 256px (~32px por célula no mapa)
+CELULAS_POR_TILE = 8
+MAX_ZOOM = 22
+MAX_PRECISION = 6
+
+
+def parse_coordenadas(endereco):
+    """Converte um endereço no formato 'lat,lng' em (lat, lng).
+
+    Retorna (None, None) quando o texto não é um par de coordenadas válido.
+    """
+    if not endereco:
+        return None, None
+    try:
+        lat, lng = map(float, endereco.split(','))
+    except ValueError:
+        return None, None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None, None
+    return lat, lng
+
+
+def parse_bbox(valor):
+    """Lê um bbox no formato 'oeste,sul,leste,norte' (Leaflet toBBoxString).
+
+    Retorna (min_lng, min_lat, max_lng, max_lat) ou lança ValueError.
+    """
+    partes = [float(p) for p in valor.split(',')]
+    if len(partes) != 4:
+        raise ValueError("bbox deve ter 4 valores")
+    min_lng, min_lat, max_lng, max_lat = partes
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ValueError("bbox com limites invertidos")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def tamanho_celula(zoom=None, precision=None):
+    """Lado da célula da grade, em graus.
+
+    `zoom` segue os níveis do Leaflet (0-22); `precision` é o número de casas
+    decimais das coordenadas agrupadas (0-6). Retorna None se nenhum for dado.
+    """
+    if precision is not None:
+        if not 0 <= precision <= MAX_PRECISION:
+            raise ValueError("precision fora do intervalo")
+        return 10.0 ** -precision
+    if zoom is not None:
+        if not 0 <= zoom <= MAX_ZOOM:
+            raise ValueError("zoom fora do intervalo")
+        return 360.0 / (2 ** zoom * CELULAS_POR_TILE)
+    return None
+
+
+def agrupar_em_grade(pontos, celula, peso=1.0):
+    """Agrupa pontos (lat, lng) em células de `celula` graus.
+
+    Retorna [lat, lng, peso] por célula, com lat/lng no centróide dos pontos
+    da célula e peso proporcional à quantidade de pontos.
+    """
+    coords = np.asarray(pontos, dtype=np.float64).reshape(-1, 2)
+    if coords.shape[0] == 0:
+        return []
+    indices = np.floor(coords / celula).astype(np.int64)
+    _, grupo, contagem = np.unique(indices, axis=0, return_inverse=True, return_counts=True)
+    grupo = grupo.ravel()
+    lat = np.bincount(grupo, weights=coords[:, 0]) / contagem
+    lng = np.bincount(grupo, weights=coords[:, 1]) / contagem
+    return np.column_stack((lat, lng, contagem * peso)).tolist()
+
+
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash(lat, lng, precisao=5):
+    """Geohash de (lat, lng) com `precisao` caracteres."""
+    lat_int, lng_int = [-90.0, 90.0], [-180.0, 180.0]
+    resultado, bits, valor, par = [], 0, 0, True
+    while len(resultado) < precisao:
+        intervalo, coord = (lng_int, lng) if par else (lat_int, lat)
+        meio = (intervalo[0] + intervalo[1]) / 2
+        valor <<= 1
+        if coord >= meio:
+            valor |= 1
+            intervalo[0] = meio
+        else:
+            intervalo[1] = meio
+        par = not par
+        bits += 1
+        if bits == 5:
+            resultado.append(_GEOHASH_BASE32[valor])
+            bits, valor = 0, 0
+    return ''.join(resultado)
+
+
+def geohashes_bbox(bbox, precisao, limite=64):
+    """Células de geohash que cobrem o bbox (min_lng, min_lat, max_lng, max_lat).
+
+    Lança ValueError se a cobertura passar de `limite` células.
+    """
+    min_lng, min_lat, max_lng, max_lat = bbox
+    bits = 5 * precisao
+    altura = 180.0 / 2 ** (bits // 2)
+    largura = 360.0 / 2 ** (bits - bits // 2)
+    linhas = int((max_lat - min_lat) // altura) + 2
+    colunas = int((max_lng - min_lng) // largura) + 2
+    if linhas * colunas > limite * 4:
+        raise ValueError("bbox grande demais para a precisão pedida")
+    celulas = set()
+    for i in range(linhas):
+        lat = min(min_lat + i * altura, max_lat)
+        for j in range(colunas):
+            lng = min(min_lng + j * largura, max_lng)
+            celulas.add(geohash(lat, lng, precisao))
+    if len(celulas) > limite:
+        raise ValueError("bbox grande demais para a precisão pedida")
+    return sorted(celulas)
@@ -0,0 +1,129 @@
+# Pipeline de processamento das fotos enviadas (denúncias e avatares).
+#
+# O upload só grava o arquivo recebido no armazenamento (app.storage); a
+# validação, a remoção do EXIF e a geração das variantes redimensionadas rodam
+# depois, numa tarefa em segundo plano que usa o pool de threads nativas
+# (app.offload).
+import hashlib
+import io
+
+from app.offload import executar_bloqueante
+
+# Maior lado, em pixels, de cada variante (None = tamanho original)
+VARIANTES = {
+    'thumb': 320,
+    'medium': 1280,
+    'original': None,
+}
+QUALIDADE_WEBP = 80
+# Recusa imagens gigantes (descompressão maliciosa) antes de decodificar
+MAX_PIXELS = 40_000_000
+
+
+class ImagemInvalida(Exception):
+    pass
+
+
+def gerar_variantes(conteudo):
+    """Valida a imagem em `conteudo` (bytes) e gera as variantes WebP.
+
+    As variantes não carregam EXIF (GPS, modelo da câmera...); a orientação é
+    aplicada nos pixels antes. Retorna {variante: bytes}.
+    CPU-bound: chame via executar_bloqueante.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError  # type: ignore
+
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    try:
+        with Image.open(io.BytesIO(conteudo)) as img:
+            img.verify()
+        with Image.open(io.BytesIO(conteudo)) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+            gerados = {}
+            for nome, lado in VARIANTES.items():
+                variante = img.copy()
+                if lado:
+                    variante.thumbnail((lado, lado), Image.LANCZOS)
+                buffer = io.BytesIO()
+                variante.save(buffer, 'WEBP', quality=QUALIDADE_WEBP, method=4)
+                gerados[nome] = buffer.getvalue()
+    except (OSError, SyntaxError, ValueError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+        raise ImagemInvalida(str(e)) from e
+    return gerados
+
+
+def nome_por_conteudo(conteudo, ext):
+    return f'{hashlib.sha256(conteudo).hexdigest()[:32]}.{ext}'
+
+
+def _processar(armazenamento, chave):
+    """Lê o upload `chave` e grava as variantes; o original é removido por quem chama.
+
+    Cada variante recebe o hash do próprio conteúdo no nome, o que permite
+    servi-la com cache imutável. Retorna {variante: url}.
+    """
+    conteudo = armazenamento.ler(chave)
+    # Só a parte CPU-bound vai para a thread nativa: o I/O (disco ou S3)
+    # fica na green thread, que coopera com o hub do eventlet
+    variantes = executar_bloqueante(gerar_variantes, conteudo)
+    urls = {}
+    for nome, dados in variantes.items():
+        destino = nome_por_conteudo(dados, 'webp')
+        # Mesmo conteúdo, mesmo nome: se já existe não precisa gravar de novo
+        if not armazenamento.existe(destino):
+            armazenamento.salvar(destino, dados, 'image/webp', imutavel=True)
+        urls[nome] = armazenamento.url(destino)
+    return urls
+
+
+def processar_em_segundo_plano(app, chave, aplicar, reaproveitar=None):
+    """Agenda o processamento do upload `chave` sem bloquear a requisição.
+
+    `aplicar(variantes)` roda dentro de um app context com {variante: url}
+    (ou None se a imagem for inválida) e o commit é feito aqui. O upload
+    recebido só é removido depois desse commit.
+
+    Se o upload já não existe, outra tarefa processou o mesmo conteúdo e já
+    confirmou o resultado: `reaproveitar()` (app context) devolve essas
+    variantes. Sem elas a foto pendente é descartada (aplicar(None)), para
+    não ficar apontando para um arquivo removido.
+    """
+    from app import db, socketio
+    from app.storage import ChaveInexistente, armazenamento_de
+
+    def tarefa():
+        armazenamento = armazenamento_de(app)
+        try:
+            try:
+                variantes = _processar(armazenamento, chave)
+            except ChaveInexistente:
+                with app.app_context():
+                    variantes = reaproveitar() if reaproveitar else None
+                    db.session.remove()
+                if variantes is None:
+                    app.logger.warning("Upload %s já removido e sem variantes para reaproveitar", chave)
+                else:
+                    app.logger.info("Upload %s já processado; variantes reaproveitadas", chave)
+            except ImagemInvalida as e:
+                app.logger.warning("Imagem inválida descartada (%s): %s", chave, e)
+                variantes = None
+            except Exception:
+                app.logger.exception("Falha ao processar o upload %s", chave)
+                return
+            with app.app_context():
+                try:
+                    aplicar(variantes)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Falha ao registrar variantes de %s", chave)
+                finally:
+                    db.session.remove()
+        finally:
+            # Depois do commit: uma requisição que reutilizou o upload e perdeu
+            # esta tarefa encontra as variantes já confirmadas (reaproveitar)
+            armazenamento.remover(chave)
+
+    socketio.start_background_task(tarefa)
@@ -0,0 +1,248 @@
+# Métricas de requisições e de SQL, expostas em /metrics (formato texto do Prometheus).
+#
+# Por requisição: latência (histograma por endpoint), contagem por status,
+# requisições em andamento, quantidade de consultas e tempo gasto no banco.
+# Requisições acima de SLOW_REQUEST_MS vão para o log com o SQL executado.
+# Uso do pool de conexões (em uso, livres, overflow) lido a cada coleta.
+#
+# Os valores são do processo: com vários workers, cada um expõe os seus
+# (o Prometheus agrega pelas labels de instância).
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, current_app, g, has_request_context, request  # type: ignore
+from sqlalchemy import event  # type: ignore
+from sqlalchemy.engine import Engine  # type: ignore
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 3, 5, 10, 20, 50, 100)
+MAX_SQL_GUARDADO = 50  # Consultas guardadas por requisição para o log de lentidão
+MAX_SQL_TEXTO = 500
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(nomes, valores):
+    if not nomes:
+        return ''
+    return '{' + ','.join(f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)) + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    tipo = 'counter'
+
+    def __init__(self, nome, ajuda, labels=()):
+        self.nome, self.ajuda, self.labels = nome, ajuda, tuple(labels)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, valor=1):
+        with self._lock:
+            self._valores[labels] = self._valores.get(labels, 0) + valor
+
+    def amostras(self):
+        with self._lock:
+            itens = list(self._valores.items())
+        for labels, valor in itens:
+            yield self.nome, _labels(self.labels, labels), valor
+
+
+class Medidor(Contador):
+    tipo = 'gauge'
+
+    def dec(self, *labels, valor=1):
+        self.inc(*labels, valor=-valor)
+
+    def set(self, *labels, valor):
+        with self._lock:
+            self._valores[labels] = valor
+
+
+class Histograma:
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, labels=(), buckets=BUCKETS_SEGUNDOS):
+        self.nome, self.ajuda, self.labels = nome, ajuda, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [contagem por bucket..., +Inf], soma
+        self._lock = threading.Lock()
+
+    def observar(self, *labels, valor):
+        posicao = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(labels)
+            if serie is None:
+                serie = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][posicao] += 1
+            serie[1] += valor
+
+    def amostras(self):
+        with self._lock:
+            itens = [(labels, list(contagens), soma) for labels, (contagens, soma) in self._series.items()]
+        nomes_le = self.labels + ('le',)
+        for labels, contagens, soma in itens:
+            acumulado = 0
+            for limite, quantidade in zip(self.buckets + ('+Inf',), contagens):
+                acumulado += quantidade
+                le = limite if limite == '+Inf' else _numero(float(limite))
+                yield f'{self.nome}_bucket', _labels(nomes_le, labels + (le,)), acumulado
+            yield f'{self.nome}_sum', _labels(self.labels, labels), soma
+            yield f'{self.nome}_count', _labels(self.labels, labels), acumulado
+
+
+class Registro:
+    def __init__(self):
+        self._metricas = []
+        self._coletores = []
+
+    def adicionar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def coletor(self, func):
+        """Função chamada antes de cada exposição (para medidores lidos sob demanda)."""
+        self._coletores.append(func)
+        return func
+
+    def exposicao(self):
+        for coletar in self._coletores:
+            coletar()
+        linhas = []
+        for metrica in self._metricas:
+            linhas.append(f'# HELP {metrica.nome} {metrica.ajuda}')
+            linhas.append(f'# TYPE {metrica.nome} {metrica.tipo}')
+            for nome, labels, valor in metrica.amostras():
+                linhas.append(f'{nome}{labels} {_numero(valor)}')
+        return '\n'.join(linhas) + '\n'
+
+
+registro = Registro()
+
+requisicoes_total = registro.adicionar(Contador(
+    'http_requests_total', 'Requisições HTTP concluídas', ('endpoint', 'method', 'status')))
+duracao_requisicao = registro.adicionar(Histograma(
+    'http_request_duration_seconds', 'Latência das requisições HTTP', ('endpoint', 'method')))
+em_andamento = registro.adicionar(Medidor(
+    'http_requests_in_flight', 'Requisições HTTP em andamento'))
+em_andamento.set(valor=0)
+consultas_por_requisicao = registro.adicionar(Histograma(
+    'db_queries_per_request', 'Consultas SQL por requisição', ('endpoint',), BUCKETS_CONSULTAS))
+tempo_db_requisicao = registro.adicionar(Histograma(
+    'db_time_per_request_seconds', 'Tempo gasto no banco por requisição', ('endpoint',)))
+requisicoes_lentas = registro.adicionar(Contador(
+    'http_slow_requests_total', 'Requisições acima de SLOW_REQUEST_MS', ('endpoint',)))
+pool_tamanho = registro.adicionar(Medidor(
+    'db_pool_size', 'Conexões permanentes do pool do SQLAlchemy (sem overflow)'))
+pool_conexoes = registro.adicionar(Medidor(
+    'db_pool_connections', 'Conexões do pool do SQLAlchemy por estado', ('estado',)))
+cache_respostas = registro.adicionar(Contador(
+    'http_response_cache_total', 'Consultas ao cache de respostas (hit/miss)', ('endpoint', 'resultado')))
+
+
+class _EstadoRequisicao:
+    __slots__ = ('inicio', 'consultas', 'tempo_db', 'sql', 'status')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tempo_db = 0.0
+        self.sql = []
+        self.status = 500  # Sobrescrito no after_request; exceção não tratada fica 500
+
+
+def _estado():
+    return g.get('_metricas') if has_request_context() else None
+
+
+# Eventos do Engine (classe): valem para o engine criado sob demanda pelo Flask-SQLAlchemy
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_sql(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_metricas_inicio', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _depois_sql(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get('_metricas_inicio')
+    if not inicios:
+        return
+    duracao = time.perf_counter() - inicios.pop()
+    estado = _estado()
+    if estado is None:
+        return
+    estado.consultas += 1
+    estado.tempo_db += duracao
+    if len(estado.sql) < MAX_SQL_GUARDADO:
+        estado.sql.append((duracao, statement[:MAX_SQL_TEXTO]))
+
+
+def _inicio_requisicao():
+    g._metricas = _EstadoRequisicao()
+    em_andamento.inc()
+
+
+def _status_requisicao(response):
+    estado = _estado()
+    if estado is not None:
+        estado.status = response.status_code
+    return response
+
+
+def _fim_requisicao(exc=None):
+    estado = g.pop('_metricas', None)
+    if estado is None:
+        return
+    em_andamento.dec()
+    duracao = time.perf_counter() - estado.inicio
+    endpoint = request.endpoint or '<sem rota>'
+    metodo = request.method
+
+    requisicoes_total.inc(endpoint, metodo, str(estado.status))
+    duracao_requisicao.observar(endpoint, metodo, valor=duracao)
+    consultas_por_requisicao.observar(endpoint, valor=estado.consultas)
+    tempo_db_requisicao.observar(endpoint, valor=estado.tempo_db)
+
+    limite_ms = current_app.config['SLOW_REQUEST_MS']
+    if limite_ms and duracao * 1000 >= limite_ms:
+        requisicoes_lentas.inc(endpoint)
+        mais_lentas = sorted(estado.sql, key=lambda item: item[0], reverse=True)[:5]
+        current_app.logger.warning(
+            "Requisição lenta: %s %s -> %s em %.0f ms; %d consultas, %.0f ms no banco%s",
+            metodo, request.full_path.rstrip('?'), estado.status, duracao * 1000,
+            estado.consultas, estado.tempo_db * 1000,
+            ''.join(f'\n  [{d * 1000:.1f} ms] {" ".join(sql.split())}' for d, sql in mais_lentas),
+        )
+
+
+@registro.coletor
+def _coletar_pool():
+    # Lido na hora da exposição; NullPool (PgBouncer) não tem o que medir
+    pool = current_app.extensions['sqlalchemy'].engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return
+    pool_tamanho.set(valor=pool.size())
+    pool_conexoes.set('em_uso', valor=pool.checkedout())
+    pool_conexoes.set('livres', valor=pool.checkedin())
+    # overflow() começa em -pool_size e só fica positivo além do tamanho fixo
+    pool_conexoes.set('overflow', valor=max(pool.overflow(), 0))
+
+
+def metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Não autorizado\n', status=401, mimetype='text/plain')
+    return Response(registro.exposicao(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+def configurar_metricas(app):
+    app.before_request(_inicio_requisicao)
+    app.after_request(_status_requisicao)
+    # teardown roda mesmo com exceção (e ao fim dos streams)
+    app.teardown_request(_fim_requisicao)
+    app.add_url_rule('/metrics', 'metrics', metrics)
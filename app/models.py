@@ -1,5 +1,57 @@
+import enum
+import logging
+import unicodedata
+from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash  # type:ignore
+from sqlalchemy import event, inspect, literal, literal_column, table, update  # type:ignore
+from sqlalchemy.orm import validates  # type:ignore
+from flask import g  # type:ignore
 from app import db
+from app.cache import resposta_cache
+from app.decorators import role_cache
+from app.geo import parse_coordenadas
+from app.offload import executar_bloqueante
+
+
+class StatusDenuncia(str, enum.Enum):
+    PENDENTE = 'Pendente'
+    EM_ANDAMENTO = 'Em andamento'
+    RESOLVIDO = 'Resolvido'
+    CANCELADO = 'Cancelado'
+
+    @classmethod
+    def normalizar(cls, valor):
+        """Converte variações ('resolvida', 'EM_ANDAMENTO', ...) no valor canônico.
+
+        Lança ValueError para status desconhecidos.
+        """
+        chave = unicodedata.normalize('NFKD', str(valor or ''))
+        chave = ''.join(c for c in chave if not unicodedata.combining(c))
+        chave = ' '.join(chave.replace('_', ' ').lower().split())
+        try:
+            return _STATUS_ALIASES[chave]
+        except KeyError:
+            raise ValueError(f"Status inválido: {valor!r}") from None
+
+
+_STATUS_ALIASES = {
+    'pendente': StatusDenuncia.PENDENTE,
+    'aberta': StatusDenuncia.PENDENTE,
+    'aberto': StatusDenuncia.PENDENTE,
+    'em andamento': StatusDenuncia.EM_ANDAMENTO,
+    'andamento': StatusDenuncia.EM_ANDAMENTO,
+    'resolvido': StatusDenuncia.RESOLVIDO,
+    'resolvida': StatusDenuncia.RESOLVIDO,
+    'cancelado': StatusDenuncia.CANCELADO,
+    'cancelada': StatusDenuncia.CANCELADO,
+}
+
+# Status considerados "ativos" no mapa (IN positivo, indexável)
+STATUS_ATIVOS = (StatusDenuncia.PENDENTE.value, StatusDenuncia.EM_ANDAMENTO.value)
+
+
+def is_resolvido(status):
+    return status == StatusDenuncia.RESOLVIDO.value
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -10,23 +62,65 @@ class User(db.Model):
     cpf = db.Column(db.String(14), unique=True, nullable=False)
     fotoUrl = db.Column(db.String(255), nullable=True)
     role = db.Column(db.String(20), nullable=False, default="user")
+    # Contador materializado de denúncias resolvidas (ranking)
+    resolvidas = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
     
     denuncias = db.relationship('Denuncia', backref='user', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = executar_bloqueante(generate_password_hash, password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return executar_bloqueante(check_password_hash, self.password_hash, password)
+
+class ContadorVersao(db.Model):
+    """Versão monotônica por tabela, incrementada a cada escrita (cursor de sync)."""
+    __tablename__ = 'contador_versao'
+
+    tabela = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+# No PostgreSQL a versão de user não usa a linha de contador_versao: ela só
+# marca que a tabela mudou (ETag/cache), então vem de uma sequência
+# incrementada após o commit, sem trava. Assim só 'denuncia' trava um contador
+# e nenhuma transação espera por duas travas (sem deadlock entre elas).
+SEQUENCIA_USER = db.Sequence('contador_versao_user_seq', metadata=db.metadata)
+MARCADORES = {'user': SEQUENCIA_USER}
+
 
 class Denuncia(db.Model):
+    __table_args__ = (
+        # Índice composto para consultas por viewport (bbox) do mapa
+        db.Index('ix_denuncia_lat_lng', 'latitude', 'longitude'),
+        # Filtros por status (mapa de ativas) e "minhas denúncias" por status
+        db.Index('ix_denuncia_status', 'status'),
+        db.Index('ix_denuncia_user_id_status', 'user_id', 'status'),
+        # Cursor do endpoint de sincronização (/denuncias/changes)
+        db.Index('ix_denuncia_versao', 'versao', unique=True),
+        db.CheckConstraint(
+            'status IN (%s)' % ', '.join(f"'{s.value}'" for s in StatusDenuncia),
+            name='ck_denuncia_status'
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(255), nullable=False)
     tipo = db.Column(db.String(50), nullable=False)
-    status = db.Column(db.String(20), nullable=False, default="Pendente")
+    status = db.Column(db.String(20), nullable=False, default=StatusDenuncia.PENDENTE.value)
     endereco = db.Column(db.String(255), nullable=True)
     descricao = db.Column(db.Text, nullable=True)  # Campo opcional
     reportFotoUrl = db.Column(db.String(255), nullable=True)  # Campo para foto da denúncia
+    reportThumbUrl = db.Column(db.String(255), nullable=True)  # Miniatura gerada pelo pipeline de imagens
+    reportMediumUrl = db.Column(db.String(255), nullable=True)  # Variante média, para a tela de detalhe
+    reportFotoHash = db.Column(db.String(64), nullable=True, index=True)  # SHA-256 da foto enviada (deduplicação)
+    latitude = db.Column(db.Float, nullable=True)  # Preenchidos a partir do endereco
+    longitude = db.Column(db.Float, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, server_default=db.func.now(), index=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           server_default=db.func.now(), index=True)
+    deleted_at = db.Column(db.DateTime, nullable=True)  # Tombstone: removida, mas visível no sync
+    versao = db.Column(db.BigInteger, nullable=True)  # Preenchida a cada escrita (ContadorVersao)
     
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     username = db.relationship('User', backref='Denuncia')
@@ -35,3 +129,178 @@ class Denuncia(db.Model):
         if not kwargs.get('user_id'):
             raise ValueError("Denúncia deve ter um user_id válido")
         super().__init__(**kwargs)
+
+    @classmethod
+    def visiveis(cls):
+        """Consulta base das listagens: ignora denúncias removidas."""
+        return cls.query.filter(cls.deleted_at.is_(None))
+
+    def remover(self):
+        # Remoção lógica: o tombstone é o que o /denuncias/changes entrega
+        self.deleted_at = datetime.utcnow()
+
+    @validates('status')
+    def _normaliza_status(self, key, status):
+        return StatusDenuncia.normalizar(status).value
+
+    @validates('endereco')
+    def _atualiza_coordenadas(self, key, endereco):
+        # Mantém latitude/longitude em sincronia com o endereço 'lat,lng'
+        self.latitude, self.longitude = parse_coordenadas(endereco)
+        return endereco
+
+
+def _valor_antigo(obj, attr):
+    """Valor carregado do banco, ignorando alterações pendentes."""
+    historico = inspect(obj).attrs[attr].history
+    return (historico.deleted or historico.unchanged or [None])[0]
+
+
+@event.listens_for(db.session, 'before_flush')
+def _atualiza_contador_resolvidas(session, flush_context, instances):
+    """Ajusta User.resolvidas conforme denúncias entram/saem do status resolvido."""
+    deltas = {}
+
+    def ajustar(user_id, delta):
+        if user_id is not None and delta:
+            deltas[user_id] = deltas.get(user_id, 0) + delta
+
+    for obj in session.new:
+        if isinstance(obj, Denuncia) and is_resolvido(obj.status) and obj.deleted_at is None:
+            ajustar(obj.user_id, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Denuncia):
+            if is_resolvido(_valor_antigo(obj, 'status')) and _valor_antigo(obj, 'deleted_at') is None:
+                ajustar(_valor_antigo(obj, 'user_id'), -1)
+    for obj in session.dirty:
+        if not isinstance(obj, Denuncia):
+            continue
+        estado = inspect(obj).attrs
+        if not any(estado[a].history.has_changes() for a in ('status', 'user_id', 'deleted_at')):
+            continue
+        # Denúncias removidas (tombstone) deixam de contar no ranking
+        if is_resolvido(_valor_antigo(obj, 'status')) and _valor_antigo(obj, 'deleted_at') is None:
+            ajustar(_valor_antigo(obj, 'user_id'), -1)
+        if is_resolvido(obj.status) and obj.deleted_at is None:
+            ajustar(obj.user_id, 1)
+
+    for user_id, delta in deltas.items():
+        if delta:
+            session.execute(
+                update(User.__table__)
+                .where(User.__table__.c.id == user_id)
+                .values(resolvidas=User.__table__.c.resolvidas + delta)
+            )
+
+
+def _usa_marcador(session, tabela):
+    return tabela in MARCADORES and session.get_bind().dialect.name == 'postgresql'
+
+
+def reservar_versoes(session, tabela, quantidade=1):
+    """Reserva `quantidade` números de versão seguidos para `tabela`.
+
+    O UPDATE trava a linha do contador até o commit, então as transações que
+    gravam na tabela confirmam em ordem de versão: um cliente que sincronizou
+    até a versão N nunca deixa passar uma alteração com versão menor que N.
+    Retorna a primeira versão reservada, ou None para as tabelas de
+    MARCADORES no PostgreSQL (incrementadas só após o commit).
+    """
+    # Respostas em cache que dependem da tabela são invalidadas após o commit
+    session.info.setdefault('tabelas_alteradas', set()).add(tabela)
+    if _usa_marcador(session, tabela):
+        return None
+    contador = ContadorVersao.__table__
+    resultado = session.execute(
+        update(contador)
+        .where(contador.c.tabela == tabela)
+        .values(versao=contador.c.versao + quantidade)
+    )
+    if resultado.rowcount == 0:
+        session.execute(contador.insert().values(tabela=tabela, versao=quantidade))
+    atual = session.execute(
+        db.select(contador.c.versao).where(contador.c.tabela == tabela)
+    ).scalar_one()
+    return atual - quantidade + 1
+
+
+def versoes_atuais(tabelas):
+    """Versão atual de cada tabela (0 se nunca gravada), numa única consulta."""
+    contador = ContadorVersao.__table__
+    marcadores = [t for t in tabelas if _usa_marcador(db.session, t)]
+    consulta = db.select(contador.c.tabela, contador.c.versao).where(
+        contador.c.tabela.in_([t for t in tabelas if t not in marcadores])
+    )
+    for tabela in marcadores:
+        consulta = consulta.union_all(
+            db.select(literal(tabela), literal_column('last_value')).select_from(table(MARCADORES[tabela].name))
+        )
+    versoes = dict(db.session.execute(consulta).all())
+    return [versoes.get(t, 0) for t in tabelas]
+
+
+def versoes_da_requisicao(tabelas):
+    """versoes_atuais lidas no máximo uma vez por requisição.
+
+    cache_resposta e etag_condicional usam os mesmos números, sem repetir a
+    consulta; descartadas no teardown da requisição (ver configurar_cache).
+    """
+    lidas = g.setdefault('_versoes_tabelas', {})
+    faltando = [t for t in tabelas if t not in lidas]
+    if faltando:
+        lidas.update(zip(faltando, versoes_atuais(faltando)))
+    return [lidas[t] for t in tabelas]
+
+
+def _incrementa_marcadores(engine, tabelas):
+    # Conexão própria: a transação da sessão já terminou. Se falhar, os dados
+    # já estão gravados e as respostas em cache expiram pelo TTL
+    try:
+        with engine.connect() as conn:
+            for tabela in tabelas:
+                conn.execute(db.select(MARCADORES[tabela].next_value()))
+            conn.commit()
+    except Exception:
+        logging.getLogger(__name__).exception('Falha ao incrementar a versão de %s', tabelas)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _versiona_tabelas(session, flush_context, instances):
+    alterados = [
+        obj for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, (Denuncia, User)) and (obj not in session.dirty or session.is_modified(obj))
+    ]
+    denuncias = [obj for obj in alterados if isinstance(obj, Denuncia) and obj not in session.deleted]
+    if denuncias:
+        versao = reservar_versoes(session, Denuncia.__tablename__, len(denuncias))
+        for obj in denuncias:
+            obj.versao = versao
+            versao += 1
+    elif any(isinstance(obj, Denuncia) for obj in alterados):
+        reservar_versoes(session, Denuncia.__tablename__)  # Remoção física
+    if any(isinstance(obj, User) for obj in alterados):
+        # Usuários não têm cursor próprio: a versão só marca que a tabela mudou
+        reservar_versoes(session, User.__tablename__)
+
+
+@event.listens_for(User.role, 'set')
+def _marca_role_alterado(user, valor, antigo, initiator):
+    if user.id is not None and valor != antigo:
+        db.session.info.setdefault('roles_alterados', set()).add(str(user.id))
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalida_caches(session):
+    for user_id in session.info.pop('roles_alterados', ()):
+        role_cache.delete(user_id)
+    tabelas = sorted(session.info.pop('tabelas_alteradas', ()))
+    marcadores = [t for t in tabelas if _usa_marcador(session, t)]
+    if marcadores:
+        _incrementa_marcadores(session.get_bind(), marcadores)
+    resposta_cache.invalidar(*tabelas)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _descarta_alteracoes_pendentes(session):
+    session.info.pop('roles_alterados', None)
+    session.info.pop('tabelas_alteradas', None)
@@ -0,0 +1,69 @@
+# Execução de trabalho CPU-bound fora do hub do eventlet.
+#
+# Com gunicorn --worker-class eventlet há um único hub de green threads: uma
+# chamada que segura a CPU (hash de senha, processamento de imagem) congela
+# todas as outras requisições e os clientes Socket.IO. Aqui essas chamadas vão
+# para o pool de threads nativas do eventlet (tpool).
+
+
+def eventlet_ativo():
+    try:
+        from eventlet import patcher  # type: ignore
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched('thread')
+
+
+def executar_bloqueante(func, *args, **kwargs):
+    """Executa func(*args, **kwargs) numa thread nativa quando sob eventlet.
+
+    Sem eventlet (flask run, scripts, migrações) chama func diretamente.
+    """
+    if eventlet_ativo():
+        from eventlet import tpool  # type: ignore
+        return tpool.execute(func, *args, **kwargs)
+    return func(*args, **kwargs)
+
+
+def configurar_pool(app):
+    # Precisa rodar antes do primeiro tpool.execute (o pool é criado sob demanda)
+    try:
+        from eventlet import tpool  # type: ignore
+    except ImportError:
+        return
+    tpool.set_num_threads(app.config['TPOOL_THREADS'])
+
+
+def _psycopg2_wait_eventlet(conn, timeout=-1):
+    # Mesmo algoritmo do psycogreen: o driver fica em modo assíncrono e cada
+    # espera por I/O no socket do PostgreSQL devolve o controle ao hub.
+    import psycopg2  # type: ignore
+    from psycopg2 import extensions  # type: ignore
+    from eventlet.hubs import trampoline  # type: ignore
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise psycopg2.OperationalError("Resultado inesperado de poll: %r" % state)
+
+
+def configurar_psycopg2():
+    """Faz o psycopg2 cooperar com o eventlet durante as esperas do banco.
+
+    Sem isso cada round trip SQL bloqueia o worker inteiro (incluindo o
+    Socket.IO), porque o psycopg2 faz I/O em C e o monkey patch não o alcança.
+    """
+    if not eventlet_ativo():
+        return False
+    try:
+        from psycopg2 import extensions  # type: ignore
+    except ImportError:
+        return False
+    extensions.set_wait_callback(_psycopg2_wait_eventlet)
+    return True
@@ -1,13 +1,22 @@
-from flask import Blueprint, jsonify, request, current_app, send_from_directory  # type:ignore
+from flask import Blueprint, jsonify, request, current_app, send_from_directory, abort, Response, stream_with_context  # type:ignore
 from flask_jwt_extended import jwt_required, get_jwt_identity  # type:ignore
-from app.decorators import role_required
+from app.decorators import role_required, etag_condicional, cache_resposta
 from app import db
-from app.models import Denuncia
+from app.banco import limitar_tempo
+from sqlalchemy import and_, or_  # type:ignore
+from app.models import Denuncia, StatusDenuncia, STATUS_ATIVOS
 from app.models import User
+from app.imagens import processar_em_segundo_plano
+from app.serializers import Projecao, parse_fields, CAMPOS_LISTAGEM, CAMPOS_MINHAS, stream_ndjson, stream_csv
+from app.geo import parse_bbox, tamanho_celula, agrupar_em_grade
+from app.busca import buscar, destacar, BuscaIndisponivel, MAX_CONSULTA
+from app.storage import (armazenamento_de, chave_recebida, chave_do_usuario,
+                         EXTENSOES_UPLOAD, ChaveInexistente, UploadDiretoIndisponivel)
 import os
-from werkzeug.utils import secure_filename # type:ignore
-import uuid
-from sqlalchemy import func  # type:ignore
+import re
+import mimetypes
+from collections import namedtuple
+from werkzeug.security import safe_join # type:ignore
 
 # Definição do blueprint 'main'
 main = Blueprint('main', __name__)
@@ -15,6 +24,12 @@ main = Blueprint('main', __name__)
 # Configurações de upload
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets', 'uploads')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+# Arquivos nomeados pelo hash do conteúdo (variantes geradas pelo pipeline)
+NOME_IMUTAVEL = re.compile(r'^[0-9a-f]{32}\.[a-z0-9]+$')
+
+# Paginação das listagens
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 # Garante que a pasta de uploads existe
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -23,6 +38,126 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def armazenamento():
+    return armazenamento_de(current_app)
+
+# Foto da requisição já gravada no armazenamento. sha256 é None para uploads
+# diretos (foto_key); gravada indica se esta requisição criou o arquivo.
+FotoRecebida = namedtuple('FotoRecebida', 'chave sha256 gravada')
+
+def _receber_foto(foto, user_id):
+    """Grava o arquivo enviado, em blocos, com chave derivada do conteúdo."""
+    ext = foto.filename.rsplit('.', 1)[1].lower()
+    chave, sha256, gravada = armazenamento().salvar_enderecado(
+        foto.stream, lambda digest: chave_recebida(user_id, ext, digest), EXTENSOES_UPLOAD[ext]
+    )
+    return FotoRecebida(chave, sha256, gravada)
+
+def _foto_enviada(user_id):
+    """Foto da requisição: arquivo no multipart ou foto_key de um upload direto.
+
+    Retorna (FotoRecebida, erro); ambos None quando não há foto.
+    """
+    foto_key = request.form.get('foto_key')
+    if foto_key:
+        # Só uploads pendentes do próprio usuário, e que de fato chegaram ao storage
+        if not chave_do_usuario(foto_key, user_id):
+            return None, "Parâmetro 'foto_key' inválido"
+        try:
+            tamanho = armazenamento().tamanho(foto_key)
+        except ChaveInexistente:
+            return None, "Parâmetro 'foto_key' inválido"
+        # O POST pré-assinado já limita o tamanho; conferido de novo antes de
+        # o processamento carregar o arquivo na memória
+        limite = current_app.config['MAX_CONTENT_LENGTH']
+        if tamanho > limite:
+            armazenamento().remover(foto_key)
+            return None, f"Arquivo maior que o limite de {limite // (1024 * 1024)} MB"
+        # Cada upload direto vale para uma foto só: sem hash, uma segunda
+        # denúncia não teria como reaproveitar as variantes do primeiro
+        url = armazenamento().url(foto_key)
+        if db.session.query(Denuncia.id).filter(Denuncia.reportFotoUrl == url).first() \
+                or db.session.query(User.id).filter(User.fotoUrl == url).first():
+            return None, "Parâmetro 'foto_key' já utilizado"
+        return FotoRecebida(foto_key, None, False), None
+    foto = request.files.get('foto')
+    if foto is None:
+        return None, None
+    if foto.filename == '':
+        return None, "Nenhum arquivo selecionado"
+    if not allowed_file(foto.filename):
+        return None, "Formato de arquivo não permitido"
+    return _receber_foto(foto, user_id), None
+
+# Callbacks do pipeline de imagens (rodam em segundo plano, com app context)
+def _variantes_denuncia(denuncia_id, sha256=None):
+    def aplicar(variantes):
+        filtro = Denuncia.id == denuncia_id
+        if sha256:
+            # Outras denúncias com a mesma foto que ainda aguardam as variantes
+            filtro = or_(filtro, and_(Denuncia.reportFotoHash == sha256, Denuncia.reportThumbUrl.is_(None)))
+        for denuncia in Denuncia.query.filter(filtro):
+            denuncia.reportFotoUrl = variantes['original'] if variantes else None
+            denuncia.reportThumbUrl = variantes['thumb'] if variantes else None
+            denuncia.reportMediumUrl = variantes['medium'] if variantes else None
+    return aplicar
+
+def _variantes_ja_processadas(sha256):
+    # Outra denúncia com a mesma foto já tem as variantes confirmadas
+    def reaproveitar():
+        if not sha256:
+            return None
+        processada = db.session.query(
+            Denuncia.reportFotoUrl, Denuncia.reportThumbUrl, Denuncia.reportMediumUrl
+        ).filter(Denuncia.reportFotoHash == sha256, Denuncia.reportThumbUrl.isnot(None)).first()
+        return dict(zip(('original', 'thumb', 'medium'), processada)) if processada else None
+    return reaproveitar
+
+def _variantes_avatar(user_id, foto_enviada):
+    # Avatares são exibidos pequenos: a foto é trocada pela miniatura
+    def aplicar(variantes):
+        usuario = User.query.get(user_id)
+        if usuario and usuario.fotoUrl == foto_enviada:
+            usuario.fotoUrl = variantes['thumb'] if variantes else None
+    return aplicar
+
+def _arg_inteiro(nome, padrao=None):
+    """Inteiro não negativo da query string; ValueError se presente e malformado."""
+    valor = request.args.get(nome)
+    if not valor:
+        return padrao
+    # type=int do Flask devolveria o padrão em silêncio para '12abc'
+    if not (valor.isascii() and valor.isdigit()):
+        raise ValueError(f"Parâmetro '{nome}' inválido")
+    return int(valor)
+
+def _filtrar_denuncias(query):
+    """Filtros de ?status=, ?tipo= e ?user_id=. Lança ValueError para parâmetro inválido."""
+    query = query.filter(Denuncia.deleted_at.is_(None))
+    status = request.args.get('status')
+    if status:
+        query = query.filter(Denuncia.status == StatusDenuncia.normalizar(status).value)
+    tipo = request.args.get('tipo')
+    if tipo:
+        query = query.filter(Denuncia.tipo == tipo)
+    user_id = _arg_inteiro('user_id')
+    if user_id is not None:
+        query = query.filter(Denuncia.user_id == user_id)
+    return query
+
+def _resposta_stream(gerador, mimetype, nome_arquivo=None):
+    resposta = Response(stream_with_context(gerador), mimetype=mimetype)
+    # Sem buffer no nginx: os chunks saem conforme são gerados
+    resposta.headers['X-Accel-Buffering'] = 'no'
+    if nome_arquivo:
+        resposta.headers['Content-Disposition'] = f'attachment; filename={nome_arquivo}'
+    return resposta
+
+@main.app_errorhandler(413)
+def arquivo_muito_grande(e):
+    limite = current_app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    return jsonify({"error": f"Arquivo maior que o limite de {limite} MB"}), 413
+
 @main.route('/')
 def home():
     return jsonify({"message": "API rodando!"})
@@ -33,12 +168,191 @@ denuncia_routes = Blueprint('denuncia_routes', __name__)
 
 
 @denuncia_routes.route('/denuncias', methods=['GET'])
+@cache_resposta('denuncia', 'user')
+@etag_condicional('denuncia', 'user')
 def get_denuncias():
     """
-    Cria uma nova denúncia
+    Lista as denúncias com paginação por cursor
+    ---
+    tags:
+      - Denúncias
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        description: Quantidade máxima de denúncias por página (padrão 50, máximo 200)
+      - name: cursor
+        in: query
+        type: integer
+        description: Valor de next_cursor retornado pela página anterior
+      - name: status
+        in: query
+        type: string
+        enum: [Pendente, Em andamento, Resolvido, Cancelado]
+      - name: tipo
+        in: query
+        type: string
+      - name: user_id
+        in: query
+        type: integer
+      - name: fields
+        in: query
+        type: string
+        description: "Campos retornados, separados por vírgula (ex: id,titulo,status,thumbUrl)"
+      - name: format
+        in: query
+        type: string
+        enum: [json, ndjson]
+        description: "ndjson devolve a mesma página, uma denúncia por linha, com o próximo cursor no header X-Next-Cursor"
+    responses:
+      200:
+        description: Página de denúncias (mais recentes primeiro)
+        schema:
+          type: object
+          properties:
+            items:
+              type: array
+              items:
+                $ref: '#/definitions/Denuncia'
+            next_cursor:
+              type: integer
+              description: Cursor da próxima página (null quando não há mais itens)
+      400:
+        description: Parâmetros inválidos
+    """
+    try:
+        limit = _arg_inteiro('limit', DEFAULT_PAGE_SIZE)
+        cursor = _arg_inteiro('cursor')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if limit < 1:
+        return jsonify({"error": "Parâmetro 'limit' inválido"}), 400
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    try:
+        projecao = Projecao(parse_fields(request.args.get('fields'), CAMPOS_LISTAGEM))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Só as colunas pedidas; o autor vem no mesmo SELECT quando necessário.
+    # Filtros aplicados no banco, não no cliente
+    try:
+        query = _filtrar_denuncias(projecao.consulta())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Paginação keyset: id decrescente, a partir do último id da página anterior
+    if cursor is not None:
+        query = query.filter(Denuncia.id < cursor)
+    query = query.order_by(Denuncia.id.desc())
+
+    linhas = query.limit(limit + 1).all()
+
+    next_cursor = None
+    items = projecao.linhas(linhas[:limit])
+    if len(linhas) > limit:
+        next_cursor = items[-1]['id']
+
+    if request.args.get('format') == 'ndjson':
+        # Mesma página (limit/cursor) do JSON, uma denúncia por linha; a tabela
+        # inteira em streaming só no export do admin
+        dumps = current_app.json.dumps
+        resposta = current_app.response_class(
+            ''.join(dumps(item) + '\n' for item in items), mimetype='application/x-ndjson'
+        )
+        if next_cursor is not None:
+            resposta.headers['X-Next-Cursor'] = str(next_cursor)
+        return resposta
+
+    return jsonify({
+        'items': items,
+        'next_cursor': next_cursor
+    })
+
+@denuncia_routes.route('/denuncias/search', methods=['GET'])
+@etag_condicional('denuncia', 'user')
+def buscar_denuncias():
+    """
+    Busca textual no título e na descrição das denúncias
     ---
     tags:
       - Denúncias
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: 'Termos da busca (aceita "frase exata", OR e -exclusão no PostgreSQL)'
+      - name: limit
+        in: query
+        type: integer
+        description: Quantidade máxima de resultados (padrão 50, máximo 200)
+      - name: offset
+        in: query
+        type: integer
+      - name: status
+        in: query
+        type: string
+        enum: [Pendente, Em andamento, Resolvido, Cancelado]
+      - name: tipo
+        in: query
+        type: string
+      - name: user_id
+        in: query
+        type: integer
+      - name: fields
+        in: query
+        type: string
+        description: "Campos retornados, separados por vírgula"
+    responses:
+      200:
+        description: Denúncias por ordem de relevância, com relevancia e destaque (trechos em HTML escapado, termos em <mark>)
+      400:
+        description: Parâmetros inválidos
+      501:
+        description: Banco sem busca textual (só PostgreSQL e SQLite)
+    """
+    q = ' '.join(request.args.get('q', '').split())
+    if not q:
+        return jsonify({"error": "Parâmetro 'q' é obrigatório"}), 400
+    if len(q) > MAX_CONSULTA:
+        return jsonify({"error": f"Parâmetro 'q' deve ter no máximo {MAX_CONSULTA} caracteres"}), 400
+    try:
+        limit = _arg_inteiro('limit', DEFAULT_PAGE_SIZE)
+        offset = _arg_inteiro('offset', 0)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if limit < 1:
+        return jsonify({"error": "Parâmetro 'limit' inválido"}), 400
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    try:
+        campos = parse_fields(request.args.get('fields'), CAMPOS_LISTAGEM)
+        projecao, linhas = buscar(campos, q, _filtrar_denuncias, limit, offset)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except BuscaIndisponivel as e:
+        return jsonify({"error": str(e)}), 501
+
+    items = []
+    for linha in linhas:
+        relevancia, titulo, descricao = linha[projecao.extras]
+        item = projecao.linha(linha)
+        item['relevancia'] = float(relevancia)
+        item['destaque'] = {'titulo': destacar(titulo), 'descricao': destacar(descricao)}
+        items.append(item)
+    return jsonify({'items': items})
+
+@denuncia_routes.route('/denuncias', methods=['POST'])
+@jwt_required()
+def create_denuncia():
+    """
+    Cria uma denúncia, com foto opcional
+    ---
+    tags:
+      - Denúncias
+    security:
+      - Bearer: []
     consumes:
       - multipart/form-data
     parameters:
@@ -53,6 +367,7 @@ def get_denuncias():
       - name: status
         in: formData
         type: string
+        enum: [Pendente, Em andamento, Resolvido, Cancelado]
       - name: endereco
         in: formData
         type: string
@@ -62,104 +377,225 @@ def get_denuncias():
       - name: foto
         in: formData
         type: file
+      - name: foto_key
+        in: formData
+        type: string
+        description: Chave devolvida por /api/uploads/presign (alternativa ao arquivo)
     responses:
       201:
-        description: Denúncia criada com sucesso
-    """
-    denuncias = Denuncia.query.all()
-    return jsonify([
-        {
-            'id': d.id,
-            'titulo': d.titulo,
-            'tipo': d.tipo,
-            'status': d.status,
-            'descricao': d.descricao,
-            'endereco': d.endereco,
-            'fotoUrl': getattr(d.user, 'fotoUrl', None),
-            'reportFotoUrl': d.reportFotoUrl,
-            'usuario': {
-                'id': d.user.id if d.user else None,
-                'username': d.user.username if d.user else None
-            } if d.user else None
-        }
-        for d in denuncias
-    ])
-
-@denuncia_routes.route('/denuncias', methods=['POST'])
-@jwt_required()
-def create_denuncia():
-    """
-    Lista as denúncias do usuário autenticado
-    ---
-    tags:
-      - Denúncias
-    responses:
-      200:
-        description: Lista de denúncias do usuário
-        schema:
-          type: array
-          items:
-            $ref: '#/definitions/Denuncia'
+        description: Denúncia criada
+      400:
+        description: Dados ou arquivo inválidos (nada é gravado)
+      413:
+        description: Arquivo maior que MAX_UPLOAD_MB
     """
     current_user_id = get_jwt_identity()
 
     # Recebe campos de texto do form
     titulo = request.form.get('titulo')
     tipo = request.form.get('tipo')
-    status = request.form.get('status', 'Pendente')
+    status = request.form.get('status', StatusDenuncia.PENDENTE.value)
     endereco = request.form.get('endereco')
     descricao = request.form.get('descricao')
 
     if not titulo or not tipo:
         return jsonify({"error": "Campos 'titulo' e 'tipo' são obrigatórios"}), 400
 
-    # Cria a denúncia sem foto primeiro
-    nova_denuncia = Denuncia(
-        titulo=titulo,
-        tipo=tipo,
-        user_id=current_user_id,
-        status=status,
-        endereco=endereco,
-        descricao=descricao,
-        reportFotoUrl=None
-    )
-    db.session.add(nova_denuncia)
-    db.session.commit()
+    try:
+        nova_denuncia = Denuncia(
+            titulo=titulo,
+            tipo=tipo,
+            user_id=current_user_id,
+            status=status,
+            endereco=endereco,
+            descricao=descricao,
+            reportFotoUrl=None
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # A foto é validada e gravada antes do commit: denúncia e foto entram
+    # juntas, numa única transação, ou nada entra
+    foto, erro = _foto_enviada(current_user_id)
+    if erro:
+        return jsonify({"error": erro}), 400
+    processar = False
+    if foto:
+        nova_denuncia.reportFotoHash = foto.sha256
+        processada = foto.sha256 and db.session.query(
+            Denuncia.reportFotoUrl, Denuncia.reportThumbUrl, Denuncia.reportMediumUrl
+        ).filter(Denuncia.reportFotoHash == foto.sha256, Denuncia.reportThumbUrl.isnot(None)).first()
+        if processada:
+            # Mesma imagem já processada: reaproveita as variantes
+            nova_denuncia.reportFotoUrl, nova_denuncia.reportThumbUrl, nova_denuncia.reportMediumUrl = processada
+            if foto.gravada:
+                armazenamento().remover(foto.chave)
+        else:
+            nova_denuncia.reportFotoUrl = armazenamento().url(foto.chave)
+            processar = True
 
-    # Agora salva a foto, se houver, usando o id da denúncia + uuid
-    foto = request.files.get('foto')
-    if foto and foto.filename != '':
-        if not allowed_file(foto.filename):
-            return jsonify({"error": "Formato de arquivo não permitido"}), 400
-        ext = foto.filename.rsplit('.', 1)[1].lower()
-        unique_id = uuid.uuid4().hex
-        filename = secure_filename(f"denuncia_{nova_denuncia.id}_{unique_id}.{ext}")
-        caminho = os.path.join(UPLOAD_FOLDER, filename)
-        foto.save(caminho)
-        foto_url = f'/assets/uploads/{filename}'
-        nova_denuncia.reportFotoUrl = foto_url
+    db.session.add(nova_denuncia)
+    try:
         db.session.commit()
+    except Exception:
+        db.session.rollback()
+        if foto and foto.gravada and processar:
+            armazenamento().remover(foto.chave)
+        raise
+
+    if processar:
+        # Validação, remoção do EXIF e variantes ficam fora da requisição
+        processar_em_segundo_plano(
+            current_app._get_current_object(), foto.chave,
+            _variantes_denuncia(nova_denuncia.id, foto.sha256),
+            _variantes_ja_processadas(foto.sha256)
+        )
 
     return jsonify({
         "message": "Denuncia criada com sucesso!",
         "id": nova_denuncia.id
     }), 201
 
+@denuncia_routes.route('/uploads/presign', methods=['POST'])
+@jwt_required()
+def presign_upload():
+    """
+    Gera uma URL pré-assinada para enviar a foto direto ao armazenamento
+    ---
+    tags:
+      - Denúncias
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        schema:
+          type: object
+          required: [extensao]
+          properties:
+            extensao:
+              type: string
+              enum: [png, jpg, jpeg, gif]
+    responses:
+      200:
+        description: "Envie um POST multipart para a url com os fields indicados e o arquivo no campo 'file' (por último), depois informe a key como foto_key"
+      400:
+        description: Extensão não permitida
+      501:
+        description: Armazenamento local não suporta upload direto
+    """
+    dados = request.get_json(silent=True) or {}
+    ext = str(dados.get('extensao', '')).lower().lstrip('.')
+    if ext not in EXTENSOES_UPLOAD:
+        return jsonify({"error": "Formato de arquivo não permitido"}), 400
+
+    chave = chave_recebida(get_jwt_identity(), ext)
+    expira = current_app.config['S3_PRESIGN_EXPIRES']
+    try:
+        upload = armazenamento().upload_direto(
+            chave, EXTENSOES_UPLOAD[ext], expira, current_app.config['MAX_CONTENT_LENGTH']
+        )
+    except UploadDiretoIndisponivel as e:
+        return jsonify({"error": str(e)}), 501
+    return jsonify({
+        'key': chave,
+        'url': upload['url'],
+        'method': 'POST',
+        'fields': upload['fields'],
+        'expires_in': expira,
+    })
+
 @denuncia_routes.route('/minhas-denuncias', methods=['GET'])
 @jwt_required()
 def get_minhas_denuncias():
     current_user_id = get_jwt_identity()
-    denuncias = Denuncia.query.filter_by(user_id=current_user_id).all()
-    return jsonify([
-        {
-            'id': d.id,
-            'titulo': d.titulo,
-            'tipo': d.tipo,
-            'status': d.status,
-            'descricao': d.descricao,
-            'fotoUrl': getattr(d.user, 'fotoUrl', None)
-        } for d in denuncias
-    ])
+    try:
+        projecao = Projecao(parse_fields(request.args.get('fields'), CAMPOS_MINHAS))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    linhas = (
+        projecao.consulta()
+        .filter(Denuncia.user_id == current_user_id, Denuncia.deleted_at.is_(None))
+        .all()
+    )
+    return jsonify(projecao.linhas(linhas))
+
+@denuncia_routes.route('/denuncias/changes', methods=['GET'])
+def get_denuncias_changes():
+    """
+    Alterações de denúncias desde o último sync
+    ---
+    tags:
+      - Denúncias
+    parameters:
+      - name: since
+        in: query
+        type: string
+        description: Valor de `next` da resposta anterior (vazio = desde o início)
+      - name: limit
+        in: query
+        type: integer
+        description: Máximo de alterações por resposta (padrão 50, máximo 200)
+    responses:
+      200:
+        description: Inserções/atualizações (upsert) e remoções (delete) em ordem de versão
+        schema:
+          type: object
+          properties:
+            changes:
+              type: array
+              items:
+                type: object
+                properties:
+                  op:
+                    type: string
+                    enum: [upsert, delete]
+                  id:
+                    type: integer
+                  denuncia:
+                    $ref: '#/definitions/Denuncia'
+            next:
+              type: string
+              description: Token para o próximo sync
+            has_more:
+              type: boolean
+      400:
+        description: Token inválido
+    """
+    since = request.args.get('since') or '0'
+    try:
+        limit = _arg_inteiro('limit', DEFAULT_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # isdigit() sozinho aceita dígitos Unicode ('²', '٣'), que int() rejeita ou converte
+    if not (since.isascii() and since.isdigit()) or limit < 1:
+        return jsonify({"error": "Parâmetros 'since' ou 'limit' inválidos"}), 400
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    projecao = Projecao(CAMPOS_LISTAGEM, extras=(Denuncia.id, Denuncia.deleted_at, Denuncia.versao))
+    linhas = (
+        projecao.consulta()
+        .filter(Denuncia.versao > int(since))
+        .order_by(Denuncia.versao)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(linhas) > limit
+    linhas = linhas[:limit]
+
+    changes = []
+    for linha in linhas:
+        id_, deleted_at, versao = linha[projecao.extras]
+        if deleted_at:
+            changes.append({'op': 'delete', 'id': id_})
+        else:
+            changes.append({'op': 'upsert', 'id': id_, 'denuncia': projecao.linha(linha)})
+    return jsonify({
+        'changes': changes,
+        'next': str(versao) if linhas else since,
+        'has_more': has_more
+    })
 
 @denuncia_routes.route('/denuncias/<int:id>', methods=['PUT', 'OPTIONS'])
 @jwt_required()
@@ -183,13 +619,16 @@ def update_denuncia(id):
       200:
         description: Denúncia atualizada com sucesso
     """
-    denuncia = Denuncia.query.get(id)
+    denuncia = Denuncia.visiveis().filter_by(id=id).first()
     if not denuncia:
         return jsonify({'error': 'Denúncia não encontrada'}), 404
 
     data = request.get_json()
     if 'status' in data:
-        denuncia.status = data['status']
+        try:
+            denuncia.status = data['status']
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     if 'titulo' in data:
         denuncia.titulo = data['titulo']
     if 'descricao' in data:
@@ -202,13 +641,136 @@ def update_denuncia(id):
     db.session.commit()
     return jsonify({'message': 'Denúncia atualizada com sucesso!'})
 
+@denuncia_routes.route('/denuncias/<int:id>', methods=['DELETE'])
+@jwt_required()
+@role_required('admin')
+def delete_denuncia(id):
+    """
+    Remove uma denúncia
+    ---
+    tags:
+      - Denúncias
+    security:
+      - Bearer: []
+    parameters:
+      - name: id
+        in: path
+        type: integer
+        required: true
+    responses:
+      204:
+        description: Denúncia removida com sucesso
+      404:
+        description: Denúncia não encontrada
+    """
+    denuncia = Denuncia.visiveis().filter_by(id=id).first()
+    if not denuncia:
+        return jsonify({'error': 'Denúncia não encontrada'}), 404
+
+    denuncia.remover()
+    db.session.commit()
+    return '', 204
+
+@admin_routes.route('/denuncias/export', methods=['GET'])
+@jwt_required()
+@role_required('admin')
+def exportar_denuncias():
+    """
+    Exporta todas as denúncias em NDJSON ou CSV
+    ---
+    tags:
+      - Administração
+    security:
+      - Bearer: []
+    parameters:
+      - name: format
+        in: query
+        type: string
+        enum: [ndjson, csv]
+        default: ndjson
+      - name: status
+        in: query
+        type: string
+        enum: [Pendente, Em andamento, Resolvido, Cancelado]
+      - name: tipo
+        in: query
+        type: string
+      - name: user_id
+        in: query
+        type: integer
+      - name: fields
+        in: query
+        type: string
+        description: "Campos exportados, separados por vírgula"
+    responses:
+      200:
+        description: Arquivo gerado em streaming (memória constante no servidor)
+      400:
+        description: Parâmetros inválidos
+    """
+    formato = request.args.get('format', 'ndjson')
+    if formato not in ('ndjson', 'csv'):
+        return jsonify({"error": "Parâmetro 'format' deve ser ndjson ou csv"}), 400
+    try:
+        projecao = Projecao(parse_fields(request.args.get('fields'), CAMPOS_LISTAGEM))
+        query = _filtrar_denuncias(projecao.consulta())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = query.order_by(Denuncia.id)
+    # A exportação percorre a tabela inteira: limite próprio, maior que o das requisições
+    limitar_tempo(db.session, current_app.config['DB_EXPORT_STATEMENT_TIMEOUT_MS'])
+    if formato == 'csv':
+        return _resposta_stream(stream_csv(projecao, query), 'text/csv', 'denuncias.csv')
+    return _resposta_stream(stream_ndjson(projecao, query), 'application/x-ndjson', 'denuncias.ndjson')
+
+def _consulta_coordenadas(query):
+    """Seleciona lat/lng das denúncias, restringindo ao ?bbox= se informado."""
+    query = query.with_entities(Denuncia.latitude, Denuncia.longitude).filter(
+        Denuncia.latitude.isnot(None),
+        Denuncia.longitude.isnot(None)
+    )
+    bbox = request.args.get('bbox')
+    if bbox:
+        min_lng, min_lat, max_lng, max_lat = parse_bbox(bbox)
+        query = query.filter(
+            Denuncia.latitude.between(min_lat, max_lat),
+            Denuncia.longitude.between(min_lng, max_lng)
+        )
+    return query
+
+def _pontos_mapa(query, peso):
+    """Lista [lat, lng, peso] por denúncia ou, com ?zoom=/?precision=, por célula."""
+    celula = tamanho_celula(
+        zoom=_arg_inteiro('zoom'),
+        precision=_arg_inteiro('precision')
+    )
+    if celula is None:
+        return [[lat, lng, peso] for lat, lng in query.all()]
+    return agrupar_em_grade(query.all(), celula, peso)
+
 @denuncia_routes.route('/coordenadas', methods=['GET'])
+@cache_resposta('denuncia')
+@etag_condicional('denuncia')
 def get_coordenadas():
     """
     Lista coordenadas de todas as denúncias
     ---
     tags:
       - Denúncias
+    parameters:
+      - name: bbox
+        in: query
+        type: string
+        description: "Viewport no formato oeste,sul,leste,norte (ex: -46.8,-23.7,-46.4,-23.4)"
+      - name: zoom
+        in: query
+        type: integer
+        description: Nível de zoom do mapa (0-22); agrupa os pontos em células da grade
+      - name: precision
+        in: query
+        type: integer
+        description: Casas decimais da grade (0-6); alternativa ao zoom
     responses:
       200:
         description: Lista de coordenadas
@@ -218,27 +780,37 @@ def get_coordenadas():
             type: array
             items:
               type: number
+      400:
+        description: bbox, zoom ou precision inválido
     """
-    denuncias = Denuncia.query.with_entities(Denuncia.endereco).all()
-    coordenadas = []
-
-    for denuncia in denuncias:
-        if denuncia.endereco:
-            try:
-                lat, lng = map(float, denuncia.endereco.split(','))
-                coordenadas.append([lat, lng, 0.5])
-            except ValueError:
-                continue
-
-    return jsonify(coordenadas)
+    try:
+        query = _consulta_coordenadas(Denuncia.visiveis())
+        return jsonify(_pontos_mapa(query, 0.5))
+    except ValueError as e:
+        return jsonify({'error': f"Parâmetros do mapa inválidos: {e}"}), 400
 
 @denuncia_routes.route('/coordenadas-ativas', methods=['GET'])
+@cache_resposta('denuncia')
+@etag_condicional('denuncia')
 def get_coordenadas_ativas():
     """
     Lista coordenadas de denúncias ativas (não resolvidas/canceladas)
     ---
     tags:
       - Denúncias
+    parameters:
+      - name: bbox
+        in: query
+        type: string
+        description: "Viewport no formato oeste,sul,leste,norte (ex: -46.8,-23.7,-46.4,-23.4)"
+      - name: zoom
+        in: query
+        type: integer
+        description: Nível de zoom do mapa (0-22); agrupa os pontos em células da grade
+      - name: precision
+        in: query
+        type: integer
+        description: Casas decimais da grade (0-6); alternativa ao zoom
     responses:
       200:
         description: Lista de coordenadas ativas
@@ -248,32 +820,24 @@ def get_coordenadas_ativas():
             type: array
             items:
               type: number
+      400:
+        description: bbox, zoom ou precision inválido
     """
     try:
         # Buscar apenas denúncias que não estão resolvidas nem canceladas
-        denuncias = Denuncia.query.filter(
-            ~Denuncia.status.in_(['Resolvido', 'Cancelado', 'resolvido', 'cancelado'])
-        ).all()
-        
-        coordenadas = []
-        for denuncia in denuncias:
-            if denuncia.endereco:
-                try:
-                    lat, lng = map(float, denuncia.endereco.split(','))
-                    # Formato [latitude, longitude, intensidade]
-                    coordenadas.append([
-                        float(lat),
-                        float(lng), 
-                        1.0  # intensidade padrão
-                    ])
-                except ValueError:
-                    continue
-        
-        return jsonify(coordenadas)
+        query = _consulta_coordenadas(Denuncia.visiveis().filter(
+            Denuncia.status.in_(STATUS_ATIVOS)
+        ))
+        # Formato [latitude, longitude, intensidade]
+        return jsonify(_pontos_mapa(query, 1.0))
+    except ValueError as e:
+        return jsonify({'error': f"Parâmetros do mapa inválidos: {e}"}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @denuncia_routes.route('/leaderboard', methods=['GET'])
+@cache_resposta('denuncia', 'user')
+@etag_condicional('denuncia', 'user')
 def leaderboard():
     """
     Retorna o ranking dos usuários com mais denúncias resolvidas
@@ -295,30 +859,22 @@ def leaderboard():
               resolvidas:
                 type: integer
     """
-    from .models import User, Denuncia
-
-    # Consulta: top 5 usuários com mais denúncias resolvidas
+    # Top 5 pelo contador materializado (índice em user.resolvidas); o cache
+    # fica com cache_resposta, cuja chave segue as versões das tabelas
     results = (
-        db.session.query(
-            User.id,
-            User.username,
-            func.count(Denuncia.id).label('resolvidas')
-        )
-        .join(Denuncia, Denuncia.user_id == User.id)
-        .filter(Denuncia.status.ilike('resolvido'))
-        .group_by(User.id, User.username)
-        .order_by(func.count(Denuncia.id).desc())
+        db.session.query(User.id, User.username, User.resolvidas)
+        .filter(User.resolvidas > 0)
+        .order_by(User.resolvidas.desc(), User.id)
         .limit(5)
         .all()
     )
-
-    leaderboard = [
+    return jsonify([
         {"id": r.id, "username": r.username, "resolvidas": r.resolvidas}
         for r in results
-    ]
-    return jsonify(leaderboard)
+    ])
 
 @main.route('/usuarios/<int:id>', methods=['GET'])
+@cache_resposta('user')
 def get_usuario(id):
     """
     Retorna os dados de um usuário pelo ID
@@ -384,6 +940,10 @@ def atualizar_usuario(id):
       - name: foto
         in: formData
         type: file
+      - name: foto_key
+        in: formData
+        type: string
+        description: Chave devolvida por /api/uploads/presign (alternativa ao arquivo)
     responses:
       200:
         description: Usuário atualizado
@@ -398,20 +958,17 @@ def atualizar_usuario(id):
     if telefone:
         usuario.telefone = telefone
 
-    if 'foto' in request.files:
-        foto = request.files['foto']
-        if foto.filename == '':
-            return jsonify({"error": "Nenhum arquivo selecionado"}), 400
-        
-        if not allowed_file(foto.filename):
-            return jsonify({"error": "Formato de arquivo não permitido"}), 400
-
-        filename = secure_filename(f"user_{id}_{foto.filename}")
-        caminho = os.path.join(UPLOAD_FOLDER, filename)
-        foto.save(caminho)
-        usuario.fotoUrl = f'/assets/uploads/{filename}'
+    foto, erro = _foto_enviada(get_jwt_identity())
+    if erro:
+        return jsonify({"error": erro}), 400
+    if foto:
+        usuario.fotoUrl = armazenamento().url(foto.chave)
 
     db.session.commit()
+    if foto:
+        processar_em_segundo_plano(
+            current_app._get_current_object(), foto.chave, _variantes_avatar(id, usuario.fotoUrl)
+        )
     return jsonify({
         "id": usuario.id,
         "telefone": getattr(usuario, 'telefone', None),
@@ -421,7 +978,25 @@ def atualizar_usuario(id):
 # Rota para servir arquivos estáticos
 @main.route('/assets/uploads/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    modo = current_app.config['UPLOADS_SENDFILE']
+    if modo == 'x-accel':
+        # O nginx entrega o arquivo (com ETag/Range) sem passar os bytes pelo Python
+        if not safe_join(UPLOAD_FOLDER, filename):
+            abort(404)
+        resp = current_app.response_class(mimetype=mimetypes.guess_type(filename)[0])
+        resp.headers['X-Accel-Redirect'] = current_app.config['UPLOADS_ACCEL_PREFIX'].rstrip('/') + '/' + filename
+    else:
+        # conditional=True: responde 304 para If-None-Match e 206 para Range.
+        # Com USE_X_SENDFILE o Flask só devolve o cabeçalho X-Sendfile.
+        resp = send_from_directory(UPLOAD_FOLDER, filename, conditional=True, etag=True)
+
+    if NOME_IMUTAVEL.match(filename):
+        # Nome derivado do conteúdo: o arquivo nunca muda
+        resp.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        # Nomes antigos podem ser sobrescritos: revalida sempre (barato, via 304)
+        resp.headers['Cache-Control'] = 'public, no-cache'
+    return resp
 
 def register_routes(app):
     app.register_blueprint(main)
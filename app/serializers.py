@@ -0,0 +1,206 @@
+# Serialização compartilhada de denúncias.
+#
+# As listagens selecionam só as colunas necessárias (tuplas, sem montar objetos
+# do ORM) e cada linha vira um dict através de uma Projecao. O parâmetro
+# ?fields= escolhe quais campos entram no SELECT e na resposta.
+import csv
+
+from flask import current_app  # type: ignore
+from flask.json.provider import DefaultJSONProvider  # type: ignore
+
+from app import db
+from app.models import Denuncia, User
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # Opcional: sem ele usa o json da stdlib
+    orjson = None
+
+
+def _iso(valor):
+    return valor.isoformat() if valor is not None else None
+
+
+def _usuario(user_id, username):
+    return {'id': user_id, 'username': username} if user_id is not None else None
+
+
+# Campo da API -> (colunas selecionadas, conversor opcional dos valores)
+CAMPOS_DENUNCIA = {
+    'id': ((Denuncia.id,), None),
+    'titulo': ((Denuncia.titulo,), None),
+    'tipo': ((Denuncia.tipo,), None),
+    'status': ((Denuncia.status,), None),
+    'descricao': ((Denuncia.descricao,), None),
+    'endereco': ((Denuncia.endereco,), None),
+    'latitude': ((Denuncia.latitude,), None),
+    'longitude': ((Denuncia.longitude,), None),
+    'dataCriacao': ((Denuncia.created_at,), _iso),
+    'dataAtualizacao': ((Denuncia.updated_at,), _iso),
+    'fotoUrl': ((User.fotoUrl,), None),
+    'reportFotoUrl': ((Denuncia.reportFotoUrl,), None),
+    'thumbUrl': ((Denuncia.reportThumbUrl,), None),
+    'mediumUrl': ((Denuncia.reportMediumUrl,), None),
+    'usuario': ((User.id, User.username), _usuario),
+}
+CAMPOS_LISTAGEM = tuple(CAMPOS_DENUNCIA)
+CAMPOS_MINHAS = ('id', 'titulo', 'tipo', 'status', 'descricao', 'fotoUrl', 'thumbUrl')
+
+# Linhas buscadas por ida ao banco (e escritas por chunk) nos streams
+LOTE_STREAM = 1000
+
+
+def parse_fields(valor, padrao):
+    """Lê ?fields=a,b,c. Lança ValueError para campos desconhecidos.
+
+    O 'id' sempre entra: é o cursor da paginação.
+    """
+    if not valor:
+        return padrao
+    campos = [c.strip() for c in valor.split(',') if c.strip()]
+    desconhecidos = [c for c in campos if c not in CAMPOS_DENUNCIA]
+    if desconhecidos:
+        raise ValueError(f"Campos desconhecidos: {', '.join(desconhecidos)}")
+    if 'id' not in campos:
+        campos.insert(0, 'id')
+    return tuple(dict.fromkeys(campos))
+
+
+class Projecao:
+    """SELECT das colunas de `campos` e montagem dos dicts a partir das tuplas.
+
+    `extras` são colunas adicionais lidas pelo chamador (linha[projecao.extras]),
+    que não entram no dict serializado.
+    """
+
+    def __init__(self, campos, extras=()):
+        colunas, self._montadores, self.cabecalho_csv = [], [], []
+        for nome in campos:
+            cols, conversor = CAMPOS_DENUNCIA[nome]
+            inicio = len(colunas)
+            colunas.extend(cols)
+            if conversor is None and len(cols) == 1:
+                self._montadores.append((nome, inicio, None))
+            else:
+                self._montadores.append((nome, slice(inicio, len(colunas)), conversor))
+            # No CSV campos compostos viram uma coluna por valor (usuario.id, usuario.username)
+            if len(cols) == 1:
+                self.cabecalho_csv.append(nome)
+            else:
+                self.cabecalho_csv.extend(f'{nome}.{c.key}' for c in cols)
+        self.extras = slice(len(colunas), len(colunas) + len(extras))
+        colunas.extend(extras)
+        self.colunas = colunas
+        self._com_usuario = any(getattr(c, 'class_', None) is User for c in colunas)
+
+    def consulta(self):
+        query = db.session.query(*self.colunas).select_from(Denuncia)
+        if self._com_usuario:
+            # Autor vem no mesmo SELECT (sem N+1)
+            query = query.outerjoin(User, User.id == Denuncia.user_id)
+        return query
+
+    def linha(self, row):
+        resultado = {}
+        for nome, pos, conversor in self._montadores:
+            if conversor is None:
+                resultado[nome] = row[pos]
+            else:
+                resultado[nome] = conversor(*row[pos])
+        return resultado
+
+    def linhas(self, rows):
+        return [self.linha(row) for row in rows]
+
+    def linha_csv(self, row):
+        valores = []
+        for _, pos, conversor in self._montadores:
+            if conversor is None:
+                if isinstance(pos, slice):
+                    valores.extend(row[pos])
+                else:
+                    valores.append(row[pos])
+            elif pos.stop - pos.start == 1:
+                valores.append(conversor(*row[pos]))
+            else:
+                valores.extend(row[pos])
+        return valores
+
+
+def _em_lotes(query, lote):
+    """Percorre a consulta com cursor do lado do servidor, `lote` linhas por vez.
+
+    yield_per liga stream_results: no PostgreSQL o psycopg2 usa um cursor
+    nomeado e só `lote` linhas ficam em memória; nada de .all().
+    """
+    buffer = []
+    for row in query.yield_per(lote):
+        buffer.append(row)
+        if len(buffer) >= lote:
+            yield buffer
+            buffer = []
+    if buffer:
+        yield buffer
+
+
+def stream_ndjson(projecao, query, lote=LOTE_STREAM):
+    """Gerador de NDJSON (um objeto por linha), com memória constante."""
+    dumps = current_app.json.dumps
+    for rows in _em_lotes(query, lote):
+        yield ''.join(dumps(projecao.linha(row)) + '\n' for row in rows)
+
+
+class _Linhas:
+    # Destino do csv.writer: acumula o texto do lote atual
+    def __init__(self):
+        self.partes = []
+
+    def write(self, texto):
+        self.partes.append(texto)
+
+
+def stream_csv(projecao, query, lote=LOTE_STREAM):
+    """Gerador de CSV (cabeçalho + linhas), com memória constante."""
+    destino = _Linhas()
+    writer = csv.writer(destino)
+    writer.writerow(projecao.cabecalho_csv)
+    for rows in _em_lotes(query, lote):
+        writer.writerows(projecao.linha_csv(row) for row in rows)
+        yield ''.join(destino.partes)
+        destino.partes.clear()
+    if destino.partes:  # Consulta vazia: só o cabeçalho
+        yield ''.join(destino.partes)
+
+
+class JSONProviderRapido(DefaultJSONProvider):
+    """Provider JSON do Flask baseado no orjson (usado por jsonify).
+
+    Mantém a saída do provider padrão: chaves ordenadas e datas no formato
+    RFC 1123 (o orjson as repassa para self.default em vez de usar ISO 8601).
+    """
+
+    def _opcoes(self):
+        opcoes = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        return opcoes | orjson.OPT_SORT_KEYS if self.sort_keys else opcoes
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._opcoes()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        corpo = orjson.dumps(obj, default=self.default, option=self._opcoes() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(corpo, mimetype=self.mimetype)
+
+
+def configurar_json(app):
+    if orjson is not None:
+        app.json = JSONProviderRapido(app)
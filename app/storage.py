@@ -0,0 +1,256 @@
+# Armazenamento das fotos (uploads recebidos e variantes geradas).
+#
+# STORAGE_BACKEND escolhe onde os arquivos ficam:
+#   'local' - pasta assets/uploads do container, servida por /assets/uploads
+#   's3'    - bucket S3 ou compatível (MinIO, R2...), com upload direto pelo
+#             cliente via URL pré-assinada: os bytes não passam pelo worker
+#
+# As chaves são nomes simples (sem '/'): 'recebida_<user>_<sha256|uuid>.<ext>'
+# para o arquivo enviado, ainda não processado, e '<sha256>.webp' para as
+# variantes. Chaves derivadas do conteúdo nunca são gravadas duas vezes.
+import hashlib
+import os
+import re
+import shutil
+import uuid
+
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+EXTENSOES_UPLOAD = {'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg', 'gif': 'image/gif'}
+CHAVE_RECEBIDA = re.compile(r'^recebida_(\d+)_[0-9a-f]{32}\.(png|jpe?g|gif)$')
+TAMANHO_BLOCO = 64 * 1024  # Leitura/escrita dos uploads em blocos, sem carregar tudo na memória
+
+
+class UploadDiretoIndisponivel(Exception):
+    pass
+
+
+class ChaveInexistente(Exception):
+    pass
+
+
+def chave_recebida(user_id, ext, sha256=None):
+    """Chave de um upload recebido: pelo conteúdo, se o hash é conhecido, ou aleatória."""
+    return f'recebida_{user_id}_{(sha256 or uuid.uuid4().hex)[:32]}.{ext}'
+
+
+def _blocos(arquivo):
+    while True:
+        bloco = arquivo.read(TAMANHO_BLOCO)
+        if not bloco:
+            return
+        yield bloco
+
+
+def chave_do_usuario(chave, user_id):
+    """True se `chave` é um upload recebido (ainda não processado) de `user_id`."""
+    casamento = CHAVE_RECEBIDA.match(chave or '')
+    return bool(casamento) and casamento.group(1) == str(user_id)
+
+
+class ArmazenamentoLocal:
+    """Arquivos numa pasta local, servidos pela rota /assets/uploads."""
+
+    def __init__(self, pasta, prefixo_url='/assets/uploads/'):
+        self.pasta = pasta
+        self.prefixo_url = prefixo_url
+        os.makedirs(pasta, exist_ok=True)
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, os.path.basename(chave))
+
+    def salvar(self, chave, dados, content_type=None, imutavel=False):
+        """Grava bytes ou um arquivo aberto; a troca é atômica (os.replace)."""
+        destino = self._caminho(chave)
+        temporario = f'{destino}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp'
+        with open(temporario, 'wb') as f:
+            if isinstance(dados, (bytes, bytearray)):
+                f.write(dados)
+            else:
+                shutil.copyfileobj(dados, f)
+        os.replace(temporario, destino)
+
+    def salvar_enderecado(self, arquivo, nomear, content_type=None):
+        """Grava `arquivo` em blocos calculando o SHA-256 no mesmo passo.
+
+        A chave final é nomear(sha256); se ela já existe o temporário é
+        descartado e o conteúdo repetido não ocupa espaço extra.
+        Retorna (chave, sha256, gravado).
+        """
+        temporario = os.path.join(self.pasta, f'.recebendo.{os.getpid()}.{uuid.uuid4().hex}.tmp')
+        sha = hashlib.sha256()
+        try:
+            with open(temporario, 'wb') as f:
+                for bloco in _blocos(arquivo):
+                    sha.update(bloco)
+                    f.write(bloco)
+            chave = nomear(sha.hexdigest())
+            destino = self._caminho(chave)
+            if os.path.exists(destino):
+                return chave, sha.hexdigest(), False
+            os.replace(temporario, destino)
+            return chave, sha.hexdigest(), True
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    def ler(self, chave):
+        try:
+            with open(self._caminho(chave), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            raise ChaveInexistente(chave) from None
+
+    def existe(self, chave):
+        return os.path.exists(self._caminho(chave))
+
+    def tamanho(self, chave):
+        try:
+            return os.path.getsize(self._caminho(chave))
+        except FileNotFoundError:
+            raise ChaveInexistente(chave) from None
+
+    def remover(self, chave):
+        try:
+            os.remove(self._caminho(chave))
+        except FileNotFoundError:
+            pass
+
+    def url(self, chave):
+        return f'{self.prefixo_url}{chave}'
+
+    def upload_direto(self, chave, content_type, expira, tamanho_maximo):
+        raise UploadDiretoIndisponivel('Upload direto não disponível no armazenamento local')
+
+
+def _nao_encontrado(erro):
+    return erro.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+
+def _boto3():
+    # Importado só pelo backend 's3' (o boto3 leva ~150 ms para carregar)
+    try:
+        import boto3  # type: ignore
+        from botocore.config import Config as BotoConfig  # type: ignore
+        from botocore.exceptions import ClientError  # type: ignore
+    except ImportError:
+        raise RuntimeError("STORAGE_BACKEND='s3' requer o pacote boto3") from None
+    return boto3, BotoConfig, ClientError
+
+
+class ArmazenamentoS3:
+    """Bucket S3 (ou compatível, via endpoint_url) usando boto3."""
+
+    def __init__(self, bucket, endpoint_url=None, regiao=None, url_publica=None, prefixo=''):
+        boto3, BotoConfig, self._ClientError = _boto3()
+        self.bucket = bucket
+        self.prefixo = prefixo
+        self.cliente = boto3.client(
+            's3', endpoint_url=endpoint_url, region_name=regiao,
+            # path-style: funciona com MinIO e endpoints sem DNS por bucket
+            config=BotoConfig(signature_version='s3v4', s3={'addressing_style': 'path' if endpoint_url else 'auto'}),
+        )
+        if url_publica:
+            self._base_url = url_publica.rstrip('/')
+        elif endpoint_url:
+            self._base_url = f"{endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            self._base_url = f"https://{bucket}.s3.{regiao or 'us-east-1'}.amazonaws.com"
+
+    def _key(self, chave):
+        return f'{self.prefixo}{chave}'
+
+    def salvar(self, chave, dados, content_type=None, imutavel=False):
+        extras = {}
+        if content_type:
+            extras['ContentType'] = content_type
+        if imutavel:
+            extras['CacheControl'] = CACHE_IMUTAVEL
+        if isinstance(dados, (bytes, bytearray)):
+            self.cliente.put_object(Bucket=self.bucket, Key=self._key(chave), Body=dados, **extras)
+        else:
+            self.cliente.upload_fileobj(dados, self.bucket, self._key(chave), ExtraArgs=extras)
+
+    def salvar_enderecado(self, arquivo, nomear, content_type=None):
+        """Calcula o SHA-256 de `arquivo` em blocos e o envia como nomear(sha256).
+
+        `arquivo` precisa aceitar seek (o upload do Werkzeug já fica num
+        arquivo temporário): o hash é lido antes, para não enviar de novo um
+        conteúdo que o bucket já tem. Retorna (chave, sha256, gravado).
+        """
+        inicio = arquivo.tell()
+        sha = hashlib.sha256()
+        for bloco in _blocos(arquivo):
+            sha.update(bloco)
+        arquivo.seek(inicio)
+        chave = nomear(sha.hexdigest())
+        if self.existe(chave):
+            return chave, sha.hexdigest(), False
+        self.salvar(chave, arquivo, content_type)
+        return chave, sha.hexdigest(), True
+
+    def ler(self, chave):
+        try:
+            return self.cliente.get_object(Bucket=self.bucket, Key=self._key(chave))['Body'].read()
+        except self._ClientError as e:
+            if _nao_encontrado(e):
+                raise ChaveInexistente(chave) from None
+            raise
+
+    def existe(self, chave):
+        try:
+            self.cliente.head_object(Bucket=self.bucket, Key=self._key(chave))
+            return True
+        except self._ClientError as e:
+            if _nao_encontrado(e):
+                return False
+            raise
+
+    def tamanho(self, chave):
+        try:
+            return self.cliente.head_object(Bucket=self.bucket, Key=self._key(chave))['ContentLength']
+        except self._ClientError as e:
+            if _nao_encontrado(e):
+                raise ChaveInexistente(chave) from None
+            raise
+
+    def remover(self, chave):
+        self.cliente.delete_object(Bucket=self.bucket, Key=self._key(chave))
+
+    def url(self, chave):
+        return f'{self._base_url}/{self._key(chave)}'
+
+    def upload_direto(self, chave, content_type, expira, tamanho_maximo):
+        """POST pré-assinado para o cliente enviar o arquivo direto ao bucket.
+
+        Diferente de um PUT pré-assinado, a política do POST limita o tamanho
+        (content-length-range): o S3 recusa arquivos acima de tamanho_maximo.
+        Retorna {'url': ..., 'fields': {...}} (campos do formulário multipart).
+        """
+        return self.cliente.generate_presigned_post(
+            self.bucket, self._key(chave),
+            Fields={'Content-Type': content_type},
+            Conditions=[{'Content-Type': content_type}, ['content-length-range', 1, tamanho_maximo]],
+            ExpiresIn=expira,
+        )
+
+
+def configurar_armazenamento(app, pasta_local):
+    backend = app.config['STORAGE_BACKEND']
+    if backend == 's3':
+        armazenamento = ArmazenamentoS3(
+            app.config['S3_BUCKET'],
+            endpoint_url=app.config['S3_ENDPOINT_URL'],
+            regiao=app.config['S3_REGION'],
+            url_publica=app.config['S3_PUBLIC_URL'],
+            prefixo=app.config['S3_PREFIX'],
+        )
+    elif backend == 'local':
+        armazenamento = ArmazenamentoLocal(pasta_local)
+    else:
+        raise RuntimeError(f'STORAGE_BACKEND desconhecido: {backend!r}')
+    app.extensions['armazenamento'] = armazenamento
+    return armazenamento
+
+
+def armazenamento_de(app):
+    return app.extensions['armazenamento']
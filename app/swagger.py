@@ -0,0 +1,92 @@
+# Documentação Swagger (flasgger) em /apidocs.
+#
+# O flasgger só é importado quando SWAGGER_ENABLED está ligado (ele traz
+# jsonschema, mistune e yaml para o boot). A spec é montada a partir das
+# docstrings no primeiro acesso a /apispec_1.json e fica em cache no processo.
+
+TEMPLATE = {
+    "swagger": "2.0",
+    "info": {
+        "title": "API de Denúncias - ResolveJá",
+        "version": "1.0.0",
+        "description": "API para registro, consulta e administração de denúncias públicas.",
+        "contact": {
+            "name": "Equipe ResolveJá",
+            "email": "contato@resolveja.com"
+        },
+        "license": {
+            "name": "MIT",
+            "url": "https://opensource.org/licenses/MIT"
+        }
+    },
+    "host": "localhost:5000",
+    "basePath": "/apidocs",
+    "schemes": ["http"],
+    "tags": [
+        {
+            "name": "Autenticação",
+            "description": "Operações de login, registro e autenticação"
+        },
+        {
+            "name": "Denúncias",
+            "description": "CRUD de denúncias"
+        },
+        {
+            "name": "Administração",
+            "description": "Rotas administrativas"
+        }
+    ],
+    "securityDefinitions": {
+        "Bearer": {
+            "type": "apiKey",
+            "name": "Authorization",
+            "in": "header",
+            "description": "JWT Authorization header usando o esquema Bearer. Exemplo: 'Authorization: Bearer {token}'"
+        }
+    },
+    "definitions": {
+        "Denuncia": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer", "example": 1},
+                "titulo": {"type": "string", "example": "Buraco na rua"},
+                "descricao": {"type": "string", "example": "Há um buraco perigoso na rua X"},
+                "status": {"type": "string", "enum": ["Pendente", "Em andamento", "Resolvido", "Cancelado"], "example": "Pendente"},
+                "dataCriacao": {"type": "string", "format": "date-time", "example": "2024-05-19T12:00:00"},
+                "imagemUrl": {"type": "string", "example": "/uploads/denuncia1.jpg"},
+                "latitude": {"type": "number", "example": -23.55052},
+                "longitude": {"type": "number", "example": -46.633308},
+                "usuarioId": {"type": "integer", "example": 2}
+            }
+        },
+        "Usuario": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer", "example": 2},
+                "nome": {"type": "string", "example": "Maria"},
+                "email": {"type": "string", "example": "maria@email.com"},
+                "role": {"type": "string", "enum": ["admin", "usuario"], "example": "usuario"}
+            }
+        },
+        "Login": {
+            "type": "object",
+            "properties": {
+                "email": {"type": "string", "example": "usuario@email.com"},
+                "senha": {"type": "string", "example": "123456"}
+            }
+        },
+        "Token": {
+            "type": "object",
+            "properties": {
+                "access_token": {"type": "string", "example": "eyJ0eXAiOiJKV1QiLCJhbGciOi..."}
+            }
+        }
+    }
+}
+
+
+def configurar_swagger(app):
+    if not app.config['SWAGGER_ENABLED']:
+        return None
+    from flasgger import Swagger  # type: ignore
+    return Swagger(app, template=TEMPLATE)
@@ -0,0 +1,42 @@
+# Funções compartilhadas pelos scripts de benchmark
+import json
+import subprocess
+import time
+
+
+def percentis(latencias_ms):
+    """p50/p95/p99/máximo de uma lista de latências em ms."""
+    if not latencias_ms:
+        return {'n': 0}
+    ordenadas = sorted(latencias_ms)
+
+    def p(q):
+        return round(ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))], 2)
+
+    return {
+        'n': len(ordenadas),
+        'p50': p(0.50),
+        'p95': p(0.95),
+        'p99': p(0.99),
+        'max': round(ordenadas[-1], 2),
+    }
+
+
+def cronometrar(func, *args, **kwargs):
+    """Executa func e retorna (resultado, duração em ms)."""
+    inicio = time.perf_counter()
+    resultado = func(*args, **kwargs)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+
+def commit_atual():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def imprimir_json(dados):
+    print(json.dumps(dados, indent=2, ensure_ascii=False))
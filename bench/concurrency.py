@@ -0,0 +1,77 @@
+"""
+Mede a vazão de um endpoint com N requisições simultâneas em andamento.
+
+Com o driver do banco cooperando com o eventlet, a vazão de um único worker
+deve crescer com a concorrência enquanto o gargalo for a espera pelo banco;
+com I/O bloqueante ela fica parada no valor de concorrência 1.
+
+Uso:
+    python bench/concurrency.py --url http://localhost:8080 --alvo "/api/denuncias?limit=50" \\
+        --niveis 1,2,4,8,16,32 --duracao 10
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import requests  # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import percentis, cronometrar, commit_atual, imprimir_json  # noqa: E402
+
+
+def rodar_nivel(url, concorrencia, duracao):
+    fim = time.perf_counter() + duracao
+    latencias, erros = [], []
+    lock = threading.Lock()
+
+    def cliente():
+        sessao = requests.Session()
+        while time.perf_counter() < fim:
+            try:
+                resp, ms = cronometrar(sessao.get, url, timeout=60)
+            except requests.RequestException as e:
+                with lock:
+                    erros.append(str(e))
+                continue
+            with lock:
+                if resp.status_code >= 400:
+                    erros.append(resp.status_code)
+                latencias.append(ms)
+
+    threads = [threading.Thread(target=cliente) for _ in range(concorrencia)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    decorrido = time.perf_counter() - inicio
+    return {
+        'concorrencia': concorrencia,
+        'req_por_s': round(len(latencias) / decorrido, 1),
+        'erros': len(erros),
+        'latencia_ms': percentis(latencias),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://localhost:8080')
+    parser.add_argument('--alvo', default='/api/denuncias?limit=50')
+    parser.add_argument('--niveis', default='1,2,4,8,16,32')
+    parser.add_argument('--duracao', type=float, default=10.0, help='segundos por nível')
+    args = parser.parse_args()
+
+    resultados = [
+        rodar_nivel(f'{args.url}{args.alvo}', int(n), args.duracao)
+        for n in args.niveis.split(',')
+    ]
+    base = resultados[0]['req_por_s'] or 1
+    for r in resultados:
+        r['escala'] = round(r['req_por_s'] / base, 2)
+    imprimir_json({'commit': commit_atual(), 'alvo': args.alvo, 'niveis': resultados})
+
+
+if __name__ == '__main__':
+    main()
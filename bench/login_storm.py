@@ -0,0 +1,81 @@
+"""
+Mede a latência de outros endpoints durante uma rajada de logins.
+
+Com o hash de senha fora do hub do eventlet, a latência de GET /api/leaderboard
+(ou do --alvo escolhido) deve ficar estável enquanto os logins rodam. Rode
+contra o servidor real (gunicorn --worker-class eventlet -w 1).
+
+Uso:
+    python bench/login_storm.py --url http://localhost:8080 --logins 200 --concorrencia 20
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests  # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import percentis, cronometrar, commit_atual, imprimir_json  # noqa: E402
+
+
+def garantir_usuario(url, email, senha):
+    requests.post(f'{url}/auth/register', json={
+        'username': email.split('@')[0], 'email': email, 'password': senha,
+        'phone': '11999999999', 'cpf': '99999999999'
+    }, timeout=30)
+
+
+def medir_alvo(url, alvo, parar, latencias):
+    sessao = requests.Session()
+    while not parar.is_set():
+        _, ms = cronometrar(sessao.get, f'{url}{alvo}', timeout=30)
+        latencias.append(ms)
+        time.sleep(0.01)
+
+
+def fase(url, alvo, duracao, logins=0, concorrencia=1, email=None, senha=None):
+    parar = threading.Event()
+    latencias = []
+    medidor = threading.Thread(target=medir_alvo, args=(url, alvo, parar, latencias))
+    medidor.start()
+    inicio = time.perf_counter()
+    if logins:
+        with ThreadPoolExecutor(concorrencia) as pool:
+            list(pool.map(
+                lambda _: requests.post(f'{url}/auth/login', json={'email': email, 'password': senha}, timeout=60),
+                range(logins)
+            ))
+    restante = duracao - (time.perf_counter() - inicio)
+    if restante > 0:
+        time.sleep(restante)
+    parar.set()
+    medidor.join()
+    return {'duracao_s': round(time.perf_counter() - inicio, 2), 'latencia_ms': percentis(latencias)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://localhost:8080')
+    parser.add_argument('--alvo', default='/api/leaderboard')
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concorrencia', type=int, default=20)
+    parser.add_argument('--duracao', type=float, default=5.0, help='duração mínima de cada fase (s)')
+    parser.add_argument('--email', default='bench@resolveja.com')
+    parser.add_argument('--senha', default='bench123')
+    args = parser.parse_args()
+
+    garantir_usuario(args.url, args.email, args.senha)
+    imprimir_json({
+        'commit': commit_atual(),
+        'alvo': args.alvo,
+        'repouso': fase(args.url, args.alvo, args.duracao),
+        'durante_logins': fase(args.url, args.alvo, args.duracao, args.logins,
+                               args.concorrencia, args.email, args.senha),
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Verifica quantas instruções SQL os endpoints de listagem executam.
+
+Popula um SQLite em memória e chama cada endpoint pelo test client do Flask,
+contando os statements enviados ao banco. Sai com código 1 se algum endpoint
+passar do limite, o que indica um N+1 (uma consulta extra por linha).
+
+Uso:
+    python bench/query_count.py [--linhas 200]
+"""
+import argparse
+import os
+import sys
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # type: ignore
+from flask_jwt_extended import create_access_token  # type: ignore
+
+from app import create_app, db
+from app.models import User, Denuncia
+
+# Limite de statements por requisição, independente do número de linhas
+ENDPOINTS = [
+    ('/api/denuncias?limit=200', 2),
+    ('/api/minhas-denuncias', 2),
+]
+
+
+def popular(linhas):
+    usuarios = [
+        User(username=f'user{i}', email=f'user{i}@teste.com', password_hash='x',
+             phone='11999999999', cpf=f'{i:011d}')
+        for i in range(1, 21)
+    ]
+    db.session.add_all(usuarios)
+    db.session.flush()
+    for i in range(linhas):
+        db.session.add(Denuncia(
+            titulo=f'Denúncia {i}',
+            tipo='Infraestrutura',
+            user_id=usuarios[i % len(usuarios)].id,
+            endereco='-23.55,-46.63',
+        ))
+    db.session.commit()
+    return usuarios[0].id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--linhas', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+    falhou = False
+    with app.app_context():
+        db.create_all()
+        user_id = popular(args.linhas)
+        token = create_access_token(identity=str(user_id))
+
+        contagem = {'n': 0}
+
+        def contar(*_):
+            contagem['n'] += 1
+
+        event.listen(db.engine, 'before_cursor_execute', contar)
+        client = app.test_client()
+        for url, limite in ENDPOINTS:
+            contagem['n'] = 0
+            resp = client.get(url, headers={'Authorization': f'Bearer {token}'})
+            ok = resp.status_code == 200 and contagem['n'] <= limite
+            falhou |= not ok
+            print(f"{'OK ' if ok else 'ERRO'} {url}: {contagem['n']} queries "
+                  f"(limite {limite}, status {resp.status_code})")
+        event.remove(db.engine, 'before_cursor_execute', contar)
+
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Benchmark dos endpoints principais com concorrência fixa, em JSON comparável entre commits.
+
+Roda cada cenário (login, listagem, coordenadas ativas, ranking e upload de
+foto) contra o servidor real durante --duracao segundos, com --concorrencia
+clientes simultâneos, e reporta p50/p95/p99, vazão e erros. Os dados vêm do
+bench/seed.py (mesma --semente => mesmo banco). Com --comparar, aponta os
+cenários cujo p95 ou vazão pioraram mais que --tolerancia em relação a um
+resultado anterior e sai com código 1.
+
+Uso:
+    python bench/seed.py --denuncias 100000
+    gunicorn --worker-class eventlet -w 1 -b :8080 run:app
+    python bench/run.py --url http://localhost:8080 --saida resultado.json
+    python bench/run.py --url http://localhost:8080 --comparar resultado.json
+"""
+import argparse
+import io
+import json
+import os
+import random
+import struct
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+import requests  # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import percentis, cronometrar, commit_atual, imprimir_json  # noqa: E402
+
+CENARIOS = ('login', 'listagem', 'coordenadas_ativas', 'leaderboard', 'upload')
+# Viewports do mapa (oeste, sul, leste, norte, zoom) dentro da região do seed
+VIEWPORTS = [
+    (-46.85, -23.80, -46.35, -23.40, 10),
+    (-46.70, -23.62, -46.55, -23.50, 12),
+    (-46.66, -23.58, -46.62, -23.54, 14),
+    (-46.64, -23.565, -46.63, -23.555, 16),
+]
+
+
+def _png_pequeno():
+    from PIL import Image  # type: ignore
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), (200, 60, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _png_unico(base, marca):
+    # Chunk tEXt antes do IEND: bytes (e SHA-256) diferentes a cada upload, sem
+    # recodificar a imagem. Fotos repetidas só exercitariam a deduplicação
+    dados = b'bench\x00' + marca.encode()
+    chunk = struct.pack('>I', len(dados)) + b'tEXt' + dados
+    chunk += struct.pack('>I', zlib.crc32(chunk[4:]))
+    return base[:-12] + chunk + base[-12:]
+
+
+class Cliente:
+    """Uma sessão HTTP por cliente simultâneo; cada cenário é um método."""
+
+    def __init__(self, url, email, senha, rng, foto):
+        self.url, self.email, self.senha, self.rng, self.foto = url, email, senha, rng, foto
+        self.sessao = requests.Session()
+        self.token = None
+        self.cursor = None
+        self.enviadas = 0
+
+    def autenticar(self):
+        resp = self.sessao.post(f'{self.url}/auth/login', json={'email': self.email, 'password': self.senha}, timeout=60)
+        resp.raise_for_status()
+        self.token = resp.json()['access_token']
+
+    def login(self):
+        return self.sessao.post(f'{self.url}/auth/login', json={'email': self.email, 'password': self.senha}, timeout=60)
+
+    def listagem(self):
+        # Primeira página ou a seguinte, como quem rola a lista
+        params = {'limit': 50}
+        if self.cursor and self.rng.random() < 0.7:
+            params['cursor'] = self.cursor
+        resp = self.sessao.get(f'{self.url}/api/denuncias', params=params, timeout=60)
+        if resp.ok:
+            self.cursor = resp.json().get('next_cursor')
+        return resp
+
+    def coordenadas_ativas(self):
+        oeste, sul, leste, norte, zoom = self.rng.choice(VIEWPORTS)
+        return self.sessao.get(f'{self.url}/api/coordenadas-ativas', params={
+            'bbox': f'{oeste},{sul},{leste},{norte}', 'zoom': zoom
+        }, timeout=60)
+
+    def leaderboard(self):
+        return self.sessao.get(f'{self.url}/api/leaderboard', timeout=60)
+
+    def upload(self):
+        lat, lng = self.rng.uniform(-23.7, -23.5), self.rng.uniform(-46.8, -46.4)
+        self.enviadas += 1
+        foto = _png_unico(self.foto, f'{id(self)}-{self.enviadas}-{time.time_ns()}')
+        return self.sessao.post(
+            f'{self.url}/api/denuncias',
+            headers={'Authorization': f'Bearer {self.token}'},
+            data={'titulo': 'Benchmark', 'tipo': 'Buraco', 'endereco': f'{lat:.6f},{lng:.6f}'},
+            files={'foto': ('bench.png', foto, 'image/png')},
+            timeout=60,
+        )
+
+
+def rodar_cenario(nome, clientes, duracao, aquecimento):
+    inicio_medicao = time.perf_counter() + aquecimento
+    fim = inicio_medicao + duracao
+    latencias, erros = [], {}
+    lock = threading.Lock()
+
+    def executar(cliente):
+        acao = getattr(cliente, nome)
+        while True:
+            agora = time.perf_counter()
+            if agora >= fim:
+                return
+            try:
+                resp, ms = cronometrar(acao)
+                chave = None if resp.status_code < 400 else str(resp.status_code)
+            except requests.RequestException as e:
+                ms, chave = None, type(e).__name__
+            if agora < inicio_medicao:
+                continue
+            with lock:
+                if chave:
+                    erros[chave] = erros.get(chave, 0) + 1
+                elif ms is not None:
+                    latencias.append(ms)
+
+    threads = [threading.Thread(target=executar, args=(c,)) for c in clientes]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    resultado = percentis(latencias)
+    resultado['rps'] = round(len(latencias) / duracao, 1)
+    resultado['erros'] = erros
+    return resultado
+
+
+def comparar(atual, anterior, tolerancia):
+    regressoes = []
+    for nome, res in atual['cenarios'].items():
+        base = anterior.get('cenarios', {}).get(nome)
+        if not base or not base.get('n') or not res.get('n'):
+            continue
+        if res['p95'] > base['p95'] * (1 + tolerancia):
+            regressoes.append(f"{nome}: p95 {base['p95']} -> {res['p95']} ms")
+        if res['rps'] < base['rps'] * (1 - tolerancia):
+            regressoes.append(f"{nome}: vazão {base['rps']} -> {res['rps']} req/s")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://localhost:8080')
+    parser.add_argument('--cenarios', default=','.join(CENARIOS))
+    parser.add_argument('--concorrencia', type=int, default=16)
+    parser.add_argument('--duracao', type=float, default=20.0, help='segundos medidos por cenário')
+    parser.add_argument('--aquecimento', type=float, default=3.0, help='segundos descartados no início')
+    parser.add_argument('--usuarios-seed', type=int, default=50, help='contas seed<N>@seed.local usadas pelos clientes')
+    parser.add_argument('--senha', default='bench123')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help='grava o resultado em arquivo JSON')
+    parser.add_argument('--comparar', help='resultado JSON anterior para detectar regressões')
+    parser.add_argument('--tolerancia', type=float, default=0.10)
+    args = parser.parse_args()
+
+    cenarios = [c for c in args.cenarios.split(',') if c]
+    desconhecidos = set(cenarios) - set(CENARIOS)
+    if desconhecidos:
+        parser.error(f"cenários desconhecidos: {', '.join(sorted(desconhecidos))}")
+
+    foto = _png_pequeno() if 'upload' in cenarios else None
+    clientes = [
+        Cliente(args.url, f'seed{1 + i % args.usuarios_seed}@seed.local', args.senha,
+                random.Random(args.semente + i), foto)
+        for i in range(args.concorrencia)
+    ]
+    if 'upload' in cenarios:
+        for cliente in clientes:
+            cliente.autenticar()
+
+    resultado = {
+        'commit': commit_atual(),
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'url': args.url,
+        'concorrencia': args.concorrencia,
+        'duracao_s': args.duracao,
+        'cenarios': {nome: rodar_cenario(nome, clientes, args.duracao, args.aquecimento) for nome in cenarios},
+    }
+
+    regressoes = []
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            anterior = json.load(arquivo)
+        regressoes = comparar(resultado, anterior, args.tolerancia)
+        resultado['comparado_com'] = anterior.get('commit')
+        resultado['regressoes'] = regressoes
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    imprimir_json(resultado)
+    sys.exit(1 if regressoes else 0)
+
+
+if __name__ == '__main__':
+    main()
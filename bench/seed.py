@@ -0,0 +1,200 @@
+"""
+Popula o banco com usuários e denúncias sintéticos para benchmarks.
+
+As coordenadas se concentram em aglomerados (como bairros com muitas
+denúncias) dentro da região de São Paulo, com parte espalhada uniformemente;
+status, tipos e datas seguem proporções fixas. Com a mesma --semente o
+resultado é idêntico, então números de commits diferentes são comparáveis.
+
+As denúncias entram em lotes com INSERT em massa (sem objetos do ORM); a
+versão de sync, o contador de resolvidas e o hash de senha (calculado uma
+vez, igual para todos) são preenchidos pelo próprio script. Todos os
+usuários gerados usam a senha de --senha e e-mail seed<N>@seed.local.
+
+Uso:
+    DATABASE_URL=postgresql://... python bench/seed.py --denuncias 100000
+    DATABASE_URL=sqlite:////tmp/bench.sqlite python bench/seed.py --denuncias 10000 --criar-tabelas
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np  # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select, update  # type: ignore
+from werkzeug.security import generate_password_hash  # type: ignore
+
+from _common import commit_atual, imprimir_json  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models import Denuncia, StatusDenuncia, User, reservar_versoes  # noqa: E402
+
+DOMINIO = '@seed.local'
+# Região metropolitana de São Paulo (oeste, sul, leste, norte)
+REGIAO = (-46.85, -23.80, -46.35, -23.40)
+STATUS = [
+    (StatusDenuncia.PENDENTE.value, 0.45),
+    (StatusDenuncia.EM_ANDAMENTO.value, 0.20),
+    (StatusDenuncia.RESOLVIDO.value, 0.30),
+    (StatusDenuncia.CANCELADO.value, 0.05),
+]
+TIPOS = ['Buraco', 'Iluminação', 'Lixo', 'Esgoto', 'Sinalização', 'Calçada', 'Árvore']
+PALAVRAS = (
+    'rua avenida esquina praça escola posto calçada poste buraco lixo entulho '
+    'vazamento esgoto semáforo placa árvore galho bueiro enchente perigo noite '
+    'moradores crianças ônibus ponto faixa pedestre ciclovia mato terreno'
+).split()
+FRACAO_DISPERSA = 0.10  # Denúncias fora dos aglomerados
+DIAS = 365  # Período coberto por created_at
+
+
+def limpar():
+    ids = select(User.id).where(User.email.like(f'%{DOMINIO}')).scalar_subquery()
+    removidas = db.session.execute(Denuncia.__table__.delete().where(Denuncia.user_id.in_(ids))).rowcount
+    usuarios = db.session.execute(User.__table__.delete().where(User.email.like(f'%{DOMINIO}'))).rowcount
+    db.session.commit()
+    return usuarios, removidas
+
+
+def criar_usuarios(quantidade, senha, lote):
+    hash_senha = generate_password_hash(senha)  # Uma vez só: o hash é caro de propósito
+    inicio = db.session.execute(select(func.coalesce(func.max(User.id), 0))).scalar()
+    for base in range(0, quantidade, lote):
+        db.session.execute(insert(User.__table__), [
+            {
+                'username': f'seed{i}', 'email': f'seed{i}{DOMINIO}', 'password_hash': hash_senha,
+                'phone': f'11{i % 10 ** 9:09d}', 'cpf': f'9{i:010d}',
+                'role': 'admin' if i == 0 else 'user', 'resolvidas': 0,
+            }
+            for i in range(base, min(base + lote, quantidade))
+        ])
+    reservar_versoes(db.session, 'user')
+    db.session.commit()
+    return db.session.execute(
+        select(User.id).where(User.email.like(f'%{DOMINIO}'), User.id > inicio).order_by(User.id)
+    ).scalars().all()
+
+
+def gerar_coordenadas(rng, n, centros, sigmas, pesos):
+    oeste, sul, leste, norte = REGIAO
+    escolhidos = rng.choice(len(centros), size=n, p=pesos)
+    pontos = centros[escolhidos] + rng.normal(size=(n, 2)) * sigmas[escolhidos, None]
+    dispersos = rng.random(n) < FRACAO_DISPERSA
+    pontos[dispersos, 0] = rng.uniform(sul, norte, dispersos.sum())
+    pontos[dispersos, 1] = rng.uniform(oeste, leste, dispersos.sum())
+    pontos[:, 0] = pontos[:, 0].clip(sul, norte)
+    pontos[:, 1] = pontos[:, 1].clip(oeste, leste)
+    return pontos
+
+
+def criar_denuncias(quantidade, usuarios, rng, aglomerados, lote):
+    oeste, sul, leste, norte = REGIAO
+    centros = np.column_stack([rng.uniform(sul, norte, aglomerados), rng.uniform(oeste, leste, aglomerados)])
+    sigmas = rng.uniform(0.003, 0.02, aglomerados)
+    # Poucos aglomerados concentram a maior parte das denúncias (distribuição de Zipf)
+    pesos = 1.0 / np.arange(1, aglomerados + 1)
+    pesos /= pesos.sum()
+    status_valores = np.array([s for s, _ in STATUS], dtype=object)
+    status_pesos = np.array([p for _, p in STATUS])
+    tipos = np.array(TIPOS, dtype=object)
+    palavras = np.array(PALAVRAS, dtype=object)
+    usuarios = np.asarray(usuarios)
+    agora = datetime.utcnow()
+
+    inseridas = 0
+    while inseridas < quantidade:
+        n = min(lote, quantidade - inseridas)
+        pontos = gerar_coordenadas(rng, n, centros, sigmas, pesos)
+        status = rng.choice(status_valores, size=n, p=status_pesos)
+        tipo = rng.choice(tipos, size=n)
+        autores = rng.choice(usuarios, size=n)
+        idade = rng.uniform(0, DIAS, n)
+        atualizacao = idade * rng.random(n)
+        texto = rng.choice(palavras, size=(n, 12))
+        versao = reservar_versoes(db.session, 'denuncia', n)
+
+        db.session.execute(insert(Denuncia.__table__), [
+            {
+                'titulo': f'{tipo[i]} na {texto[i, 0]} {texto[i, 1]}',
+                'tipo': tipo[i],
+                'status': status[i],
+                'descricao': ' '.join(texto[i]).capitalize(),
+                'endereco': f'{pontos[i, 0]:.6f},{pontos[i, 1]:.6f}',
+                'latitude': float(pontos[i, 0]),
+                'longitude': float(pontos[i, 1]),
+                'user_id': int(autores[i]),
+                'created_at': agora - timedelta(days=float(idade[i])),
+                'updated_at': agora - timedelta(days=float(atualizacao[i])),
+                'versao': versao + i,
+            }
+            for i in range(n)
+        ])
+        db.session.commit()
+        inseridas += n
+        print(f'{inseridas}/{quantidade} denúncias', file=sys.stderr)
+    return inseridas
+
+
+def atualizar_resolvidas():
+    # O INSERT em massa não passa pelo before_flush que mantém o contador
+    resolvidas = (
+        select(func.count(Denuncia.id))
+        .where(Denuncia.user_id == User.id,
+               Denuncia.status == StatusDenuncia.RESOLVIDO.value,
+               Denuncia.deleted_at.is_(None))
+        .scalar_subquery()
+    )
+    db.session.execute(update(User).where(User.email.like(f'%{DOMINIO}')).values(resolvidas=resolvidas))
+    reservar_versoes(db.session, 'user')
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--denuncias', type=int, default=10_000)
+    parser.add_argument('--usuarios', type=int, help='padrão: uma conta para cada 20 denúncias')
+    parser.add_argument('--aglomerados', type=int, default=200)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--lote', type=int, default=5_000, help='linhas por INSERT/commit')
+    parser.add_argument('--senha', default='bench123')
+    parser.add_argument('--limpar', action='store_true', help='remove dados de um seed anterior antes')
+    parser.add_argument('--criar-tabelas', action='store_true', help='db.create_all() (bancos locais sem migrações)')
+    args = parser.parse_args()
+    n_usuarios = args.usuarios or max(1, args.denuncias // 20)
+
+    app = create_app()
+    with app.app_context():
+        if args.criar_tabelas:
+            db.create_all()
+        removidos = limpar() if args.limpar else (0, 0)
+        if db.session.execute(select(User.id).where(User.email.like(f'%{DOMINIO}')).limit(1)).first():
+            sys.exit('Já existem dados de seed; use --limpar para recriá-los')
+
+        rng = np.random.default_rng(args.semente)
+        inicio = time.perf_counter()
+        usuarios = criar_usuarios(n_usuarios, args.senha, args.lote)
+        t_usuarios = time.perf_counter() - inicio
+        inseridas = criar_denuncias(args.denuncias, usuarios, rng, args.aglomerados, args.lote)
+        atualizar_resolvidas()
+        duracao = time.perf_counter() - inicio
+
+        imprimir_json({
+            'commit': commit_atual(),
+            'banco': db.engine.dialect.name,
+            'semente': args.semente,
+            'removidos': {'usuarios': removidos[0], 'denuncias': removidos[1]},
+            'usuarios': len(usuarios),
+            'denuncias': inseridas,
+            'login': {'email': f'seed1{DOMINIO}', 'admin': f'seed0{DOMINIO}', 'senha': args.senha},
+            'duracao_s': round(duracao, 2),
+            'usuarios_s': round(t_usuarios, 2),
+            'denuncias_por_s': round(inseridas / max(duracao - t_usuarios, 1e-9)),
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Verifica a entrega de eventos Socket.IO entre dois processos worker.
+
+Sobe dois gunicorn (um worker eventlet cada, portas diferentes) apontando para
+o mesmo banco SQLite e a mesma fila de mensagens, conecta um cliente em cada
+um e grava uma denúncia por HTTP no outro. Cada cliente precisa receber o
+evento gerado no processo vizinho. Sai com código 1 se algum não chegar.
+
+Requer a fila rodando (ex.: docker run -p 6379:6379 redis) e o extra
+python-socketio[client].
+
+Uso:
+    python bench/socketio_fanout.py --fila redis://localhost:6379/0
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests  # type: ignore
+import socketio  # type: ignore
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+def preparar_banco(url_banco):
+    os.environ['DATABASE_URL'] = url_banco
+    from flask_jwt_extended import create_access_token  # type: ignore
+    from app import create_app, db
+    from app.models import User
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        admin = User(username='fanout', email='fanout@teste.com', password_hash='x',
+                     phone='11999999999', cpf='00000000001', role='admin')
+        db.session.add(admin)
+        db.session.commit()
+        return create_access_token(identity=str(admin.id), additional_claims={'role': 'admin'})
+
+
+def subir_worker(porta, env):
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--worker-class', 'eventlet', '-w', '1',
+         '-b', f'127.0.0.1:{porta}', 'run:app'],
+        cwd=RAIZ, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def aguardar(url, timeout=30):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        try:
+            if requests.get(url, timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'{url} não respondeu em {timeout}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--fila', default='redis://localhost:6379/0')
+    parser.add_argument('--portas', default='8101,8102')
+    parser.add_argument('--timeout', type=float, default=5.0)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix='fanout-')
+    url_banco = f"sqlite:///{os.path.join(pasta, 'fanout.sqlite')}"
+    token = preparar_banco(url_banco)
+
+    env = dict(os.environ, DATABASE_URL=url_banco, SOCKETIO_MESSAGE_QUEUE=args.fila)
+    portas = [int(p) for p in args.portas.split(',')]
+    workers = [subir_worker(p, env) for p in portas]
+    clientes = []
+    try:
+        urls = [f'http://127.0.0.1:{p}' for p in portas]
+        for url in urls:
+            aguardar(f'{url}/')
+
+        recebidos = [[] for _ in urls]
+        chegou = [threading.Event() for _ in urls]
+        for i, url in enumerate(urls):
+            cliente = socketio.Client()
+            cliente.on('denuncia', lambda data, i=i: (recebidos[i].append(data), chegou[i].set()))
+            cliente.connect(url, auth={'token': token}, transports=['polling'])
+            clientes.append(cliente)
+
+        resultado = {}
+        for origem, destino in ((0, 1), (1, 0)):
+            chegou[destino].clear()
+            resp = requests.post(
+                f'{urls[origem]}/api/denuncias',
+                data={'titulo': f'fanout {origem}->{destino}', 'tipo': 'Teste'},
+                headers={'Authorization': f'Bearer {token}'}, timeout=10
+            )
+            resp.raise_for_status()
+            entregue = chegou[destino].wait(args.timeout)
+            resultado[f'worker{origem}->worker{destino}'] = entregue
+
+        for chave, ok in resultado.items():
+            print(f"{'OK ' if ok else 'ERRO'} {chave}")
+        sys.exit(0 if all(resultado.values()) else 1)
+    finally:
+        for cliente in clientes:
+            cliente.disconnect()
+        for worker in workers:
+            worker.terminate()
+            worker.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Mede o cold start: import + create_app() e tempo até a primeira resposta.
+
+Para cada repetição sobe o servidor do zero (--comando, por padrão gunicorn
+com um worker eventlet), consulta --alvo até receber a primeira resposta e
+anota o tempo desde o início do processo; a latência da segunda requisição
+mostra quanto da primeira foi aquecimento. Também mede `import run` num
+processo Python limpo e, com --perfil, soma o -X importtime por pacote para
+mostrar o que pesa no boot.
+
+Uso:
+    DATABASE_URL=postgresql://... python bench/startup.py --repeticoes 5 --perfil 15
+    SWAGGER_ENABLED=false python bench/startup.py --alvo /api/leaderboard
+"""
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import time
+
+import requests  # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import percentis, cronometrar, commit_atual, imprimir_json  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMANDO = 'gunicorn --worker-class eventlet -w 1 -b 127.0.0.1:{porta} run:app'
+
+
+def _ambiente():
+    return {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [RAIZ, os.environ.get('PYTHONPATH')]))}
+
+
+def tempo_create_app():
+    """Segundos de `import run` (que chama create_app) num interpretador novo."""
+    codigo = 'import time; t = time.perf_counter(); import run; print(time.perf_counter() - t)'
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, env=_ambiente(),
+                           capture_output=True, text=True, check=True).stdout
+    return float(saida.strip().splitlines()[-1]) * 1000
+
+
+def perfil_imports(quantidade):
+    """Tempo de import (self, ms) somado por pacote raiz, do maior para o menor."""
+    saida = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import run'], cwd=RAIZ,
+                           env=_ambiente(), capture_output=True, text=True, check=True).stderr
+    por_pacote = {}
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, _, nome = linha[len('import time:'):].split('|')
+        raiz = nome.strip().split('.')[0]
+        por_pacote[raiz] = por_pacote.get(raiz, 0) + int(proprio)
+    maiores = sorted(por_pacote.items(), key=lambda item: item[1], reverse=True)[:quantidade]
+    return {nome: round(us / 1000, 1) for nome, us in maiores}
+
+
+def primeira_resposta(comando, url, limite):
+    """Sobe o servidor e retorna (ms até a 1ª resposta, ms da 2ª requisição)."""
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(shlex.split(comando), cwd=RAIZ, env=_ambiente(),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - inicio < limite:
+            if processo.poll() is not None:
+                raise RuntimeError(f'O servidor terminou com código {processo.returncode}')
+            try:
+                requests.get(url, timeout=limite)
+            except requests.ConnectionError:
+                time.sleep(0.01)
+                continue
+            primeira = (time.perf_counter() - inicio) * 1000
+            _, segunda = cronometrar(requests.get, url, timeout=limite)
+            return primeira, segunda
+        raise RuntimeError(f'Sem resposta em {limite} s')
+    finally:
+        processo.terminate()
+        try:
+            processo.wait(10)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+            processo.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--comando', default=COMANDO, help='comando do servidor; {porta} é substituído')
+    parser.add_argument('--porta', type=int, default=8099)
+    parser.add_argument('--alvo', default='/api/leaderboard')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--limite', type=float, default=60.0, help='segundos esperando a primeira resposta')
+    parser.add_argument('--perfil', type=int, default=0, help='mostra os N pacotes mais caros de importar')
+    args = parser.parse_args()
+
+    comando = args.comando.format(porta=args.porta)
+    url = f'http://127.0.0.1:{args.porta}{args.alvo}'
+    create_app_ms, primeiras, segundas = [], [], []
+    for _ in range(args.repeticoes):
+        create_app_ms.append(tempo_create_app())
+        primeira, segunda = primeira_resposta(comando, url, args.limite)
+        primeiras.append(primeira)
+        segundas.append(segunda)
+
+    resultado = {
+        'commit': commit_atual(),
+        'comando': comando,
+        'alvo': args.alvo,
+        'import_create_app_ms': percentis(create_app_ms),
+        'primeira_resposta_ms': percentis(primeiras),
+        'segunda_requisicao_ms': percentis(segundas),
+        'swagger': os.getenv('SWAGGER_ENABLED', 'true'),
+    }
+    if args.perfil:
+        resultado['imports_ms'] = perfil_imports(args.perfil)
+    imprimir_json(resultado)
+
+
+if __name__ == '__main__':
+    main()
@@ -104,6 +104,9 @@ def run_migrations_online():
         )
 
         with context.begin_transaction():
+            if connection.dialect.name == 'postgresql':
+                # Índices e backfills podem passar do DB_STATEMENT_TIMEOUT_MS da aplicação
+                connection.exec_driver_sql('SET LOCAL statement_timeout = 0')
             context.run_migrations()
 
 
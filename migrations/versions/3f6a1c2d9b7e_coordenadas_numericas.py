@@ -0,0 +1,65 @@
+"""coordenadas numericas em denuncia
+
+Revision ID: 3f6a1c2d9b7e
+Revises: 
+Create Date: 2026-10-17 09:12:41.503112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6a1c2d9b7e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BATCH = 1000
+
+
+def _parse(endereco):
+    # Cópia congelada de app.geo.parse_coordenadas
+    if not endereco:
+        return None, None
+    try:
+        lat, lng = map(float, endereco.split(','))
+    except ValueError:
+        return None, None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None, None
+    return lat, lng
+
+
+def upgrade():
+    with op.batch_alter_table('denuncia', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+        batch_op.create_index('ix_denuncia_lat_lng', ['latitude', 'longitude'], unique=False)
+
+    # Backfill a partir do endereco 'lat,lng', em lotes por id
+    conn = op.get_bind()
+    update = sa.text('UPDATE denuncia SET latitude = :lat, longitude = :lng WHERE id = :id')
+    ultimo_id = 0
+    while True:
+        linhas = conn.execute(
+            sa.text('SELECT id, endereco FROM denuncia WHERE id > :ultimo ORDER BY id LIMIT :n'),
+            {'ultimo': ultimo_id, 'n': BATCH}
+        ).fetchall()
+        if not linhas:
+            break
+        valores = []
+        for id_, endereco in linhas:
+            lat, lng = _parse(endereco)
+            if lat is not None:
+                valores.append({'id': id_, 'lat': lat, 'lng': lng})
+        if valores:
+            conn.execute(update, valores)
+        ultimo_id = linhas[-1][0]
+
+
+def downgrade():
+    with op.batch_alter_table('denuncia', schema=None) as batch_op:
+        batch_op.drop_index('ix_denuncia_lat_lng')
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
@@ -0,0 +1,39 @@
+"""contador materializado de denuncias resolvidas por usuario
+
+Revision ID: 8b2d4e6f0a13
+Revises: 3f6a1c2d9b7e
+Create Date: 2026-10-17 10:03:17.218904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2d4e6f0a13'
+down_revision = '3f6a1c2d9b7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('resolvidas', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index(batch_op.f('ix_user_resolvidas'), ['resolvidas'], unique=False)
+
+    # Backfill com a mesma regra usada antes no ranking (status ILIKE 'resolvido')
+    user = sa.table('user', sa.column('id'), sa.column('resolvidas'))
+    denuncia = sa.table('denuncia', sa.column('user_id'), sa.column('status'))
+    contagem = (
+        sa.select(sa.func.count())
+        .where(denuncia.c.user_id == user.c.id)
+        .where(sa.func.lower(denuncia.c.status) == 'resolvido')
+        .scalar_subquery()
+    )
+    op.execute(user.update().values(resolvidas=contagem))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_resolvidas'))
+        batch_op.drop_column('resolvidas')
@@ -0,0 +1,69 @@
+"""busca textual em titulo e descricao (tsvector + GIN / FTS5)
+
+Revision ID: a2c4e6b8d0f1
+Revises: f1b3d5e7a9c0
+Create Date: 2026-10-17 16:20:11.902314
+
+No SQLite, migrações futuras que recriem a tabela denuncia em modo batch
+descartam os triggers do FTS5: recriá-los (SQLITE_DDL) depois delas.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2c4e6b8d0f1'
+down_revision = 'f1b3d5e7a9c0'
+branch_labels = None
+depends_on = None
+
+
+POSTGRES_DDL = (
+    """ALTER TABLE denuncia ADD COLUMN busca tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese', coalesce(titulo, '')), 'A') ||
+        setweight(to_tsvector('portuguese', coalesce(descricao, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX ix_denuncia_busca ON denuncia USING gin (busca)",
+)
+
+SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE denuncia_fts USING fts5(
+        titulo, descricao, content='denuncia', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER denuncia_fts_ai AFTER INSERT ON denuncia BEGIN
+        INSERT INTO denuncia_fts(rowid, titulo, descricao) VALUES (new.id, new.titulo, new.descricao);
+    END""",
+    """CREATE TRIGGER denuncia_fts_ad AFTER DELETE ON denuncia BEGIN
+        INSERT INTO denuncia_fts(denuncia_fts, rowid, titulo, descricao)
+        VALUES ('delete', old.id, old.titulo, old.descricao);
+    END""",
+    """CREATE TRIGGER denuncia_fts_au AFTER UPDATE OF titulo, descricao ON denuncia BEGIN
+        INSERT INTO denuncia_fts(denuncia_fts, rowid, titulo, descricao)
+        VALUES ('delete', old.id, old.titulo, old.descricao);
+        INSERT INTO denuncia_fts(rowid, titulo, descricao) VALUES (new.id, new.titulo, new.descricao);
+    END""",
+    # Indexa as denúncias já existentes
+    "INSERT INTO denuncia_fts(denuncia_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade():
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        # A coluna gerada é preenchida para as linhas existentes no próprio ALTER
+        for sql in POSTGRES_DDL:
+            op.execute(sql)
+    elif dialeto == 'sqlite':
+        for sql in SQLITE_DDL:
+            op.execute(sql)
+
+
+def downgrade():
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_denuncia_busca')
+        op.execute('ALTER TABLE denuncia DROP COLUMN IF EXISTS busca')
+    elif dialeto == 'sqlite':
+        for trigger in ('denuncia_fts_ai', 'denuncia_fts_ad', 'denuncia_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS denuncia_fts')
@@ -0,0 +1,31 @@
+"""hash da foto enviada na denuncia (deduplicacao de uploads)
+
+Revision ID: b3d5f7a9c1e2
+Revises: a2c4e6b8d0f1
+Create Date: 2026-10-17 18:41:05.220913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d5f7a9c1e2'
+down_revision = 'a2c4e6b8d0f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sem batch: recriar a tabela no SQLite descartaria os triggers do FTS5
+    op.add_column('denuncia', sa.Column('reportFotoHash', sa.String(length=64), nullable=True))
+    op.create_index('ix_denuncia_reportFotoHash', 'denuncia', ['reportFotoHash'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_denuncia_reportFotoHash', table_name='denuncia')
+    if op.get_bind().dialect.name == 'sqlite':
+        # DROP COLUMN nativo (SQLite >= 3.35) preserva os triggers do FTS5
+        op.execute('ALTER TABLE denuncia DROP COLUMN "reportFotoHash"')
+    else:
+        op.drop_column('denuncia', 'reportFotoHash')
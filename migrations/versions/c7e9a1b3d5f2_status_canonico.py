@@ -0,0 +1,67 @@
+"""status canonico em denuncia com indices por status
+
+Revision ID: c7e9a1b3d5f2
+Revises: 8b2d4e6f0a13
+Create Date: 2026-10-17 10:41:55.730266
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e9a1b3d5f2'
+down_revision = '8b2d4e6f0a13'
+branch_labels = None
+depends_on = None
+
+# Cópia congelada dos aliases de app.models.StatusDenuncia
+ALIASES = {
+    'Pendente': ['pendente', 'aberta', 'aberto'],
+    'Em andamento': ['em andamento', 'em_andamento', 'andamento'],
+    'Resolvido': ['resolvido', 'resolvida'],
+    'Cancelado': ['cancelado', 'cancelada'],
+}
+
+
+def upgrade():
+    denuncia = sa.table('denuncia', sa.column('user_id'), sa.column('status'))
+    status_normalizado = sa.func.lower(sa.func.trim(denuncia.c.status))
+    for canonico, aliases in ALIASES.items():
+        op.execute(
+            denuncia.update()
+            .where(status_normalizado.in_(aliases))
+            .values(status=canonico)
+        )
+    # Valores livres que não correspondem a nenhum status voltam para Pendente
+    op.execute(
+        denuncia.update()
+        .where(denuncia.c.status.notin_(list(ALIASES)))
+        .values(status='Pendente')
+    )
+
+    # O backfill de 8b2d4e6f0a13 só contou status exatamente 'resolvido'; com os
+    # aliases normalizados o contador é recalculado sobre o status canônico
+    user = sa.table('user', sa.column('id'), sa.column('resolvidas'))
+    contagem = (
+        sa.select(sa.func.count())
+        .where(denuncia.c.user_id == user.c.id)
+        .where(denuncia.c.status == 'Resolvido')
+        .scalar_subquery()
+    )
+    op.execute(user.update().values(resolvidas=contagem))
+
+    with op.batch_alter_table('denuncia', schema=None) as batch_op:
+        batch_op.create_index('ix_denuncia_status', ['status'], unique=False)
+        batch_op.create_index('ix_denuncia_user_id_status', ['user_id', 'status'], unique=False)
+        batch_op.create_check_constraint(
+            'ck_denuncia_status',
+            "status IN ('Pendente', 'Em andamento', 'Resolvido', 'Cancelado')"
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('denuncia', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_denuncia_status', type_='check')
+        batch_op.drop_index('ix_denuncia_user_id_status')
+        batch_op.drop_index('ix_denuncia_status')
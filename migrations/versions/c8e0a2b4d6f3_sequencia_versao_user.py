@@ -0,0 +1,38 @@
+"""versao da tabela user numa sequencia (sem trava de linha no PostgreSQL)
+
+Revision ID: c8e0a2b4d6f3
+Revises: b3d5f7a9c1e2
+Create Date: 2026-10-17 21:12:44.903517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e0a2b4d6f3'
+down_revision = 'b3d5f7a9c1e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # No SQLite o contador continua na tabela: o banco já tem uma única trava de escrita
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(sa.schema.CreateSequence(sa.Sequence('contador_versao_user_seq')))
+    op.execute(
+        "SELECT setval('contador_versao_user_seq', "
+        "COALESCE((SELECT versao FROM contador_versao WHERE tabela = 'user'), 1))"
+    )
+    op.execute("DELETE FROM contador_versao WHERE tabela = 'user'")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        "INSERT INTO contador_versao (tabela, versao) "
+        "SELECT 'user', last_value FROM contador_versao_user_seq"
+    )
+    op.execute(sa.schema.DropSequence(sa.Sequence('contador_versao_user_seq')))
@@ -0,0 +1,26 @@
+"""miniatura da foto da denuncia
+
+Revision ID: d4f6b8a0c2e1
+Revises: c7e9a1b3d5f2
+Create Date: 2026-10-17 11:26:08.914372
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f6b8a0c2e1'
+down_revision = 'c7e9a1b3d5f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('denuncia', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reportThumbUrl', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('denuncia', schema=None) as batch_op:
+        batch_op.drop_column('reportThumbUrl')
@@ -0,0 +1,29 @@
+"""variante media da foto da denuncia (tela de detalhe)
+
+Revision ID: d9f1b3c5e7a2
+Revises: c8e0a2b4d6f3
+Create Date: 2026-10-18 00:14:37.562081
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9f1b3c5e7a2'
+down_revision = 'c8e0a2b4d6f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sem batch: recriar a tabela no SQLite descartaria os triggers do FTS5
+    op.add_column('denuncia', sa.Column('reportMediumUrl', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        # DROP COLUMN nativo (SQLite >= 3.35) preserva os triggers do FTS5
+        op.execute('ALTER TABLE denuncia DROP COLUMN "reportMediumUrl"')
+    else:
+        op.drop_column('denuncia', 'reportMediumUrl')
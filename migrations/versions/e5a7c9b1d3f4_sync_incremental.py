@@ -0,0 +1,54 @@
+"""timestamps, tombstones e versao para sync incremental de denuncias
+
+Revision ID: e5a7c9b1d3f4
+Revises: d4f6b8a0c2e1
+Create Date: 2026-10-17 13:08:52.116540
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c9b1d3f4'
+down_revision = 'd4f6b8a0c2e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    contador = op.create_table('contador_versao',
+        sa.Column('tabela', sa.String(length=50), nullable=False),
+        sa.Column('versao', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('tabela')
+    )
+
+    with op.batch_alter_table('denuncia', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False))
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('versao', sa.BigInteger(), nullable=True))
+
+    # Linhas existentes: versão = id (já é monotônica) e o contador parte do maior id
+    denuncia = sa.table('denuncia', sa.column('id'), sa.column('versao'))
+    op.execute(denuncia.update().values(versao=denuncia.c.id))
+    maior = op.get_bind().execute(sa.select(sa.func.coalesce(sa.func.max(denuncia.c.id), 0))).scalar()
+    op.bulk_insert(contador, [{'tabela': 'denuncia', 'versao': maior}])
+
+    with op.batch_alter_table('denuncia', schema=None) as batch_op:
+        batch_op.create_index('ix_denuncia_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_denuncia_updated_at', ['updated_at'], unique=False)
+        batch_op.create_index('ix_denuncia_versao', ['versao'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('denuncia', schema=None) as batch_op:
+        batch_op.drop_index('ix_denuncia_versao')
+        batch_op.drop_index('ix_denuncia_updated_at')
+        batch_op.drop_index('ix_denuncia_created_at')
+        batch_op.drop_column('versao')
+        batch_op.drop_column('deleted_at')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('created_at')
+
+    op.drop_table('contador_versao')
@@ -0,0 +1,25 @@
+"""contador de versao da tabela user (ETag das respostas)
+
+Revision ID: f1b3d5e7a9c0
+Revises: e5a7c9b1d3f4
+Create Date: 2026-10-17 14:02:30.448173
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b3d5e7a9c0'
+down_revision = 'e5a7c9b1d3f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    contador = sa.table('contador_versao', sa.column('tabela', sa.String), sa.column('versao', sa.BigInteger))
+    op.bulk_insert(contador, [{'tabela': 'user', 'versao': 1}])
+
+
+def downgrade():
+    op.execute("DELETE FROM contador_versao WHERE tabela = 'user'")